@@ -0,0 +1,45 @@
+"""event live counters
+
+Revision ID: 81f8803bbab3
+Revises: a3438f47f31f
+Create Date: 2025-05-24 12:10:41.204317
+
+"""
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision: str = '81f8803bbab3'
+down_revision: Union[str, None] = 'a3438f47f31f'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def upgrade() -> None:
+    """Add count_additional and fill both counters from registrations.
+
+    additional_members stays the waitlist capacity and is not touched.
+    """
+    op.add_column('event', sa.Column('count_additional', sa.Integer(), server_default=sa.text('0'), nullable=False))
+    op.execute(
+        """
+        UPDATE event SET
+            count_members = (
+                SELECT count(*) FROM registration WHERE registration.event_id = event.id
+            ),
+            count_additional = (
+                SELECT count(*) FROM registration_additional
+                WHERE registration_additional.event_id = event.id
+            )
+        """
+    )
+    op.alter_column('event', 'count_members', server_default=sa.text('0'))
+
+
+def downgrade() -> None:
+    """Drop count_additional and the count_members default."""
+    op.alter_column('event', 'count_members', server_default=None)
+    op.drop_column('event', 'count_additional')
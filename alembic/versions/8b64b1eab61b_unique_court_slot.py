@@ -0,0 +1,47 @@
+"""unique court slot
+
+Revision ID: 8b64b1eab61b
+Revises: 81f8803bbab3
+Create Date: 2025-05-25 16:42:03.518220
+
+"""
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision: str = '8b64b1eab61b'
+down_revision: Union[str, None] = '81f8803bbab3'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def upgrade() -> None:
+    """Add unique index on (court_id, date, time)."""
+    # Неоплаченные дубли слота, оставшиеся от гонки при бронировании,
+    # удаляем: остается оплаченная бронь, а если таких нет - самая ранняя
+    op.execute(
+        """
+        DELETE FROM court_reservations AS dup
+        USING court_reservations AS keep
+        WHERE dup.court_id = keep.court_id
+          AND dup.date = keep.date
+          AND dup.time = keep.time
+          AND dup.id <> keep.id
+          AND NOT coalesce(dup.is_confirmed, false)
+          AND (coalesce(keep.is_confirmed, false) OR keep.id < dup.id)
+        """
+    )
+    op.create_index(
+        'ix_court_reservations_slot',
+        'court_reservations',
+        ['court_id', 'date', 'time'],
+        unique=True,
+    )
+
+
+def downgrade() -> None:
+    """Drop unique index on (court_id, date, time)."""
+    op.drop_index('ix_court_reservations_slot', table_name='court_reservations')
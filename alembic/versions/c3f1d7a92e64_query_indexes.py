@@ -0,0 +1,51 @@
+"""query indexes
+
+Revision ID: c3f1d7a92e64
+Revises: 8b64b1eab61b
+Create Date: 2025-06-02 11:20:47.381604
+
+"""
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision: str = 'c3f1d7a92e64'
+down_revision: Union[str, None] = '8b64b1eab61b'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+# (имя, таблица, колонки, условие частичного индекса)
+INDEXES = [
+    ('ix_court_reservations_date', 'court_reservations', ['date'], None),
+    ('ix_court_reservations_user_confirmed', 'court_reservations', ['user_id', 'is_confirmed', 'date', 'id'], None),
+    ('ix_court_reservations_unpaid_created', 'court_reservations', ['created_at'], 'is_confirmed IS NOT TRUE'),
+    ('ix_registration_user_event', 'registration', ['user_id', 'event_id'], None),
+    ('ix_registration_additional_event_id', 'registration_additional', ['event_id', 'id'], None),
+    ('ix_coworking_reservation_user_id', 'coworking_reservation', ['user_id', 'id'], None),
+    ('ix_coworking_reservation_open_user', 'coworking_reservation', ['user_id'], 'end_time IS NULL'),
+    ('ix_coworking_reservation_open_coworking', 'coworking_reservation', ['coworking_id'], 'end_time IS NULL'),
+    ('ix_event_start_time', 'event', ['start_time', 'id'], None),
+]
+
+
+def upgrade() -> None:
+    """Add indexes for the filters and keyset pages used by the DAO."""
+    # (court_id, date, time) уже покрыт уникальным ix_court_reservations_slot
+    for name, table, columns, where in INDEXES:
+        op.create_index(
+            name,
+            table,
+            columns,
+            postgresql_where=sa.text(where) if where else None,
+        )
+    op.execute('ANALYZE court_reservations, registration, registration_additional, coworking_reservation, event')
+
+
+def downgrade() -> None:
+    """Drop query indexes."""
+    for name, table, _, _ in reversed(INDEXES):
+        op.drop_index(name, table_name=table)
@@ -0,0 +1,32 @@
+"""event media variants
+
+Revision ID: e7b2c4d91a35
+Revises: c3f1d7a92e64
+Create Date: 2025-06-04 10:42:13.518207
+
+"""
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+from sqlalchemy.dialects import postgresql
+
+
+# revision identifiers, used by Alembic.
+revision: str = 'e7b2c4d91a35'
+down_revision: Union[str, None] = 'c3f1d7a92e64'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def upgrade() -> None:
+    """Store WebP variant URLs of the cover on the event row."""
+    op.add_column(
+        'event',
+        sa.Column('media_variants', postgresql.JSONB(), server_default=sa.text("'{}'::jsonb"), nullable=False),
+    )
+
+
+def downgrade() -> None:
+    """Drop media_variants."""
+    op.drop_column('event', 'media_variants')
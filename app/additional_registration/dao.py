@@ -1,8 +1,16 @@
-from sqlalchemy import select
+from sqlalchemy import delete, exists, insert, select
 
 from app.additional_registration.model import Registration_additional
 from app.dao.base import BaseDAO
-from app.database import async_session_maker
+from app.database import commit, get_session
+from app.events.dao import EventDao
+from app.registration.dao import (
+    RegistrationResult,
+    RegistrationStatus,
+    is_started,
+    lock_event,
+)
+from app.registration.model import Registration
 
 
 class RegistrationAddDao(BaseDAO):
@@ -10,7 +18,7 @@ class RegistrationAddDao(BaseDAO):
 
     @classmethod
     async def find_first_added(cls, **filter_by):
-        async with async_session_maker() as session:
+        async with get_session() as session:
             query = (
                 select(cls.model)
                 .filter_by(**filter_by)
@@ -19,3 +27,63 @@ class RegistrationAddDao(BaseDAO):
             )
             result = await session.execute(query)
             return result.scalars().first()
+
+    @classmethod
+    async def register(cls, event_id: int, user_id: int) -> RegistrationResult:
+        """
+        Записать пользователя в лист ожидания и увеличить счетчик ивента.
+        Лист ожидания вмещает не больше additional_members записей.
+        """
+        async with get_session() as session:
+            event = await lock_event(session, event_id)
+            if not event:
+                return RegistrationResult(RegistrationStatus.not_found)
+            checks_query = select(
+                exists().where(
+                    cls.model.event_id == event_id, cls.model.user_id == user_id
+                ),
+                exists().where(
+                    Registration.event_id == event_id, Registration.user_id == user_id
+                ),
+            )
+            is_registered, in_main = (await session.execute(checks_query)).one()
+            if is_registered:
+                return RegistrationResult(RegistrationStatus.duplicate, event=event)
+            if event.count_additional >= event.additional_members:
+                return RegistrationResult(RegistrationStatus.full, event=event)
+            if is_started(event):
+                return RegistrationResult(RegistrationStatus.started, event=event)
+            if in_main:
+                return RegistrationResult(RegistrationStatus.in_other_list, event=event)
+
+            query = (
+                insert(cls.model)
+                .values(event_id=event_id, user_id=user_id)
+                .returning(cls.model)
+            )
+            registration = (await session.execute(query)).scalar()
+            await EventDao.change_counters(session, event_id, additional=1)
+            await commit(session)
+            return RegistrationResult(RegistrationStatus.created, registration, event)
+
+    @classmethod
+    async def unregister(cls, event_id: int, user_id: int) -> RegistrationResult:
+        """Убрать пользователя из листа ожидания и уменьшить счетчик ивента"""
+        async with get_session() as session:
+            event = await lock_event(session, event_id)
+            if not event:
+                return RegistrationResult(RegistrationStatus.not_found)
+            registration_query = select(cls.model.id).where(
+                cls.model.event_id == event_id, cls.model.user_id == user_id
+            )
+            registration_id = (await session.execute(registration_query)).scalar()
+            if registration_id is None:
+                return RegistrationResult(RegistrationStatus.not_found)
+            if is_started(event):
+                return RegistrationResult(RegistrationStatus.started, event=event)
+            await session.execute(
+                delete(cls.model).where(cls.model.id == registration_id)
+            )
+            await EventDao.change_counters(session, event_id, additional=-1)
+            await commit(session)
+            return RegistrationResult(RegistrationStatus.deleted, event=event)
@@ -1,7 +1,7 @@
 # model.py (Registration_additional)
 from typing import TYPE_CHECKING
 
-from sqlalchemy import ForeignKey
+from sqlalchemy import ForeignKey, Index
 from sqlalchemy.orm import Mapped, mapped_column, relationship
 
 from app.database import Base
@@ -13,6 +13,10 @@ if TYPE_CHECKING:
 
 class Registration_additional(Base):
     __tablename__ = "registration_additional"
+    __table_args__ = (
+        # find_first_added: первый в листе ожидания ивента
+        Index("ix_registration_additional_event_id", "event_id", "id"),
+    )
 
     id: Mapped[int] = mapped_column(primary_key=True)
     user_id: Mapped[int] = mapped_column(ForeignKey("users.id"))
@@ -1,11 +1,9 @@
-from datetime import UTC, datetime
-
 from fastapi import APIRouter, Depends, HTTPException, status
 
 from app.additional_registration.dao import RegistrationAddDao
 from app.additional_registration.schemas import RegistrationResponse
-from app.events.dao import EventDao
-from app.registration.dao import RegistrationDao
+from app.cache import invalidate_event
+from app.registration.dao import RegistrationStatus
 from app.users.dependencies import get_current_user
 from app.users.model import User
 
@@ -18,57 +16,47 @@ router = APIRouter(
 async def registration_on_event(
     event_id: int, current_user: User = Depends(get_current_user)
 ):
-    new_registration = await RegistrationAddDao.find_one_or_none(
-        user_id=current_user.id, event_id=event_id
-    )
-    if new_registration:
+    result = await RegistrationAddDao.register(event_id=event_id, user_id=current_user.id)
+    if result.status == RegistrationStatus.not_found:
         raise HTTPException(
-            status_code=status.HTTP_409_CONFLICT, detail="вы уже записаны на этот ивент"
+            status_code=status.HTTP_404_NOT_FOUND, detail="ивент не найден"
         )
-    is_exist = await EventDao.find_one_or_none(id=event_id)
-    if not is_exist:
+    if result.status == RegistrationStatus.duplicate:
         raise HTTPException(
-            status_code=status.HTTP_404_NOT_FOUND, detail="ивент не найден"
+            status_code=status.HTTP_409_CONFLICT, detail="вы уже записаны на этот ивент"
         )
-    count_users = await RegistrationAddDao.count(event_id=event_id)
-    if is_exist.additional_members < count_users:
+    if result.status == RegistrationStatus.full:
         raise HTTPException(
             status_code=status.HTTP_409_CONFLICT, detail="места закончились"
         )
-    if is_exist.start_time < datetime.now(UTC):
+    if result.status == RegistrationStatus.started:
         raise HTTPException(
             status_code=status.HTTP_409_CONFLICT, detail="ивент уже начался или прошел"
         )
-    in_addreg = await RegistrationDao.find_one_or_none(
-        event_id=event_id, user_id=current_user.id
-    )
-    if in_addreg:
+    if result.status == RegistrationStatus.in_other_list:
         raise HTTPException(
             status_code=status.HTTP_409_CONFLICT,
             detail="у вас уже есть запись на основные места",
         )
-    user_reg = await RegistrationAddDao.add(event_id=event_id, user_id=current_user.id)
-    return user_reg
+    await invalidate_event(event_id)
+    return result.registration
 
 
 @router.post("/disregistration/{event_id}")
 async def disregistration_on_event(
     event_id: int, current_user: User = Depends(get_current_user)
 ):
-    is_registration = await RegistrationAddDao.find_one_or_none(
-        event_id=event_id, user_id=current_user.id
-    )
-    if not is_registration:
+    result = await RegistrationAddDao.unregister(event_id=event_id, user_id=current_user.id)
+    if result.status == RegistrationStatus.not_found:
         raise HTTPException(
             status_code=status.HTTP_404_NOT_FOUND,
             detail="вы не зарегистрированы на этот ивент или его не существует",
         )
-    event = await EventDao.find_one_or_none(id=event_id)
-    if event.start_time < datetime.now(UTC):
+    if result.status == RegistrationStatus.started:
         raise HTTPException(
             status_code=status.HTTP_409_CONFLICT, detail="ивент уже начался или прошел"
         )
-    await RegistrationAddDao.delete(is_registration.id)
+    await invalidate_event(event_id)
     return "запись удалена"
 
 
@@ -1,11 +1,29 @@
 from sqladmin import ModelView
 
 from app.additional_registration.model import Registration_additional
+from app.cache import invalidate_event
+from app.events.dao import EventDao
 from app.events.model import Event
+from app.events.uploads import upload_filename
 from app.registration.model import Registration
+from app.tasks.images import make_image_variants
+from app.users.cache import invalidate_user
 from app.users.model import User
 
 
+async def refresh_events(*event_ids: int | None):
+    """
+    Записи из админки идут мимо DAO: пересчитываем счетчики затронутых ивентов
+    и сбрасываем их кеш. При переносе записи затронуты старый и новый ивент.
+    """
+    event_ids = {event_id for event_id in event_ids if event_id is not None}
+    if not event_ids:
+        return
+    await EventDao.reconcile_counters(*event_ids)
+    for event_id in event_ids:
+        await invalidate_event(event_id)
+
+
 class UserAdmin(ModelView, model=User):
     # column_list = "__all__"
     can_delete = False
@@ -15,6 +33,12 @@ class UserAdmin(ModelView, model=User):
     column_details_exclude_list = [User.hashed_password]
     column_exclude_list = [User.hashed_password]
 
+    async def after_model_change(self, data, model, is_created, request):
+        await invalidate_user(model.id)
+
+    async def after_model_delete(self, model, request):
+        await invalidate_user(model.id)
+
 
 class EventAdmin(ModelView, model=Event):
     column_list = "__all__"
@@ -23,6 +47,20 @@ class EventAdmin(ModelView, model=Event):
     name_plural = "Ивенты"
     icon = "fa-solid fa-user"
     # column_exclude_list = []
+    # копии обложки записывает задача make_image_variants
+    form_excluded_columns = [Event.media_variants]
+
+    async def on_model_change(self, data, model, is_created, request):
+        request.state.media_changed = "media_url" in data and data["media_url"] != model.media_url
+        if request.state.media_changed:
+            # копии старой обложки новой не подходят
+            data["media_variants"] = {}
+
+    async def after_model_change(self, data, model, is_created, request):
+        await invalidate_event(model.id)
+        filename = upload_filename(model.media_url)
+        if request.state.media_changed and filename:
+            make_image_variants.delay(filename)
 
 
 class RegistrationAdmin(ModelView, model=Registration):
@@ -33,6 +71,15 @@ class RegistrationAdmin(ModelView, model=Registration):
     icon = "fa-solid fa-user"
     # column_exclude_list = []
 
+    async def on_model_change(self, data, model, is_created, request):
+        request.state.old_event_id = model.event_id
+
+    async def after_model_change(self, data, model, is_created, request):
+        await refresh_events(model.event_id, request.state.old_event_id)
+
+    async def after_model_delete(self, model, request):
+        await refresh_events(model.event_id)
+
 
 class RegistrationAddAdmin(ModelView, model=Registration_additional):
     column_list = "__all__"
@@ -41,3 +88,12 @@ class RegistrationAddAdmin(ModelView, model=Registration_additional):
     name_plural = "Пред регистрация"
     icon = "fa-solid fa-user"
     # column_exclude_list = []
+
+    async def on_model_change(self, data, model, is_created, request):
+        request.state.old_event_id = model.event_id
+
+    async def after_model_change(self, data, model, is_created, request):
+        await refresh_events(model.event_id, request.state.old_event_id)
+
+    async def after_model_delete(self, model, request):
+        await refresh_events(model.event_id)
@@ -0,0 +1,243 @@
+"""
+Нагрузочный прогон горячих путей: список ивентов, запись на ивент,
+временная бронь корта и вебхук оплаты.
+
+Запросы идут в приложение через ASGITransport. Работает в MODE=BENCH:
+пул соединений и кеш в Redis такие же, как в проде, а БД и Redis отдельные -
+BENCH_DATABASE_URL и BENCH_REDIS_URL, они пересоздаются и заполняются заново. Платежи идут
+через fake-шлюз с задержкой PAYMENT_FAKE_DELAY, письма - в память процесса.
+
+    MODE=BENCH BENCH_DATABASE_URL=postgresql+asyncpg://.../rondo_bench BENCH_REDIS_URL=redis://.../15 \
+        python -m app.benchmark --requests 500 --concurrency 20 --output bench.json
+"""
+import argparse
+import asyncio
+import json
+import re
+import statistics
+import subprocess
+import time
+from datetime import UTC, date, datetime, timedelta
+
+from fastapi_cache import FastAPICache
+from httpx import ASGITransport, AsyncClient
+from sqlalchemy import insert
+
+from app.cache import init_cache
+from app.config import settings
+from app.court_reservation.model import CourtReservation
+from app.courts.model import Court
+from app.database import Base, async_engine, async_session_maker, pool_status
+from app.events.model import Event
+from app.main import app
+from app.payments.service import generate_secure_rental_id
+from app.tasks.celery_app import celery
+from app.users.auth import create_access_token, get_password_hash
+from app.users.model import User
+
+SCENARIOS = ("events_list", "event_register", "court_booking", "webhook")
+QUERIES_RE = re.compile(r'desc="(\d+) queries"')
+
+
+async def seed(users: int, events: int, courts: int, pending: int):
+    """Пользователи, ивенты, корты и неоплаченные брони для вебхука"""
+    async with async_engine.begin() as conn:
+        await conn.run_sync(Base.metadata.drop_all)
+        await conn.run_sync(Base.metadata.create_all)
+
+    hashed_password = await get_password_hash("benchmark")
+    start_time = datetime.now(UTC) + timedelta(days=7)
+    async with async_session_maker() as session:
+        await session.execute(insert(User), [
+            {
+                "email": f"user{i}@bench.ru",
+                "username": f"user{i}",
+                "hashed_password": hashed_password,
+                "is_active": True,
+                "first_name": "Бенч",
+                "last_name": f"Пользователь{i}",
+            }
+            for i in range(1, users + 1)
+        ])
+        await session.execute(insert(Event), [
+            {
+                "title": f"Ивент {i}",
+                "description": "Нагрузочный прогон",
+                "max_members": users,
+                "location": "Рондо",
+                "start_time": start_time,
+            }
+            for i in range(1, events + 1)
+        ])
+        await session.execute(insert(Court), [
+            {"name": f"Корт {i}", "price": 1000, "is_available": True, "not_available_dates": []}
+            for i in range(1, courts + 1)
+        ])
+        # брони под вебхук лежат в прошлом, чтобы не пересекаться со слотами court_booking
+        await session.execute(insert(CourtReservation), [
+            {
+                "court_id": i % courts + 1,
+                "user_id": i % users + 1,
+                "date": date.today() - timedelta(days=1 + i // (courts * 12)),
+                "time": 9 + i // courts % 12,
+                "is_confirmed": False,
+                "payment_id": f"bench-{i}",
+            }
+            for i in range(pending)
+        ])
+        await session.commit()
+
+
+def requests_for(scenario: str, count: int, users: int, events: int, courts: int) -> list[dict]:
+    """Параметры запросов сценария; у каждого запроса свой пользователь/слот, чтобы не ловить 409"""
+    if scenario == "events_list":
+        return [{"method": "GET", "url": "/events/"} for _ in range(count)]
+    if scenario == "event_register":
+        return [
+            {"method": "POST", "url": f"/users/registration/{i // users % events + 1}", "user_id": i % users + 1}
+            for i in range(count)
+        ]
+    if scenario == "court_booking":
+        tomorrow = date.today() + timedelta(days=1)
+        return [
+            {
+                "method": "POST",
+                "url": "/court_reservations/temporary",
+                "user_id": i % users + 1,
+                "json": {
+                    "court_id": i % courts + 1,
+                    "date": str(tomorrow + timedelta(days=i // (courts * 12))),
+                    "time": 9 + i // courts % 12,
+                },
+            }
+            for i in range(count)
+        ]
+    if scenario == "webhook":
+        # брони с id 1..count созданы в seed в том же порядке
+        return [
+            {
+                "method": "POST",
+                "url": "/court_reservations/yookassa/webhook",
+                "json": {
+                    "event": "payment.succeeded",
+                    "object": {
+                        "id": f"bench-{i}",
+                        "status": "succeeded",
+                        "metadata": {
+                            "rental_id": str(i + 1),
+                            "rental_signature": generate_secure_rental_id(str(i + 1), settings.SECRET_KEY),
+                        },
+                    },
+                },
+            }
+            for i in range(count)
+        ]
+    raise ValueError(f"Неизвестный сценарий {scenario}")
+
+
+def percentile(values: list[float], p: float) -> float:
+    values = sorted(values)
+    index = min(len(values) - 1, max(0, round(p / 100 * len(values)) - 1))
+    return values[index]
+
+
+async def run_scenario(client: AsyncClient, specs: list[dict], concurrency: int) -> dict:
+    latencies: list[float] = []
+    queries: list[int] = []
+    statuses: dict[str, int] = {}
+    pending = iter(specs)
+
+    async def worker():
+        for spec in pending:
+            headers = {}
+            if "user_id" in spec:
+                headers["Cookie"] = f"_user_cookie={create_access_token({'sub': str(spec['user_id'])})}"
+            start = time.perf_counter()
+            response = await client.request(spec["method"], spec["url"], json=spec.get("json"), headers=headers)
+            latencies.append(time.perf_counter() - start)
+            statuses[str(response.status_code)] = statuses.get(str(response.status_code), 0) + 1
+            match = QUERIES_RE.search(response.headers.get("Server-Timing", ""))
+            if match:
+                queries.append(int(match.group(1)))
+
+    start = time.perf_counter()
+    await asyncio.gather(*(worker() for _ in range(concurrency)))
+    elapsed = time.perf_counter() - start
+
+    return {
+        "requests": len(specs),
+        "concurrency": concurrency,
+        "status_codes": statuses,
+        "duration_s": round(elapsed, 3),
+        "throughput_rps": round(len(specs) / elapsed, 1),
+        "latency_ms": {
+            "p50": round(percentile(latencies, 50) * 1000, 2),
+            "p95": round(percentile(latencies, 95) * 1000, 2),
+            "p99": round(percentile(latencies, 99) * 1000, 2),
+            "max": round(max(latencies) * 1000, 2),
+            "mean": round(statistics.mean(latencies) * 1000, 2),
+        },
+        "queries_per_request": {
+            "mean": round(statistics.mean(queries), 2) if queries else None,
+            "max": max(queries) if queries else None,
+        },
+    }
+
+
+def git_commit() -> str | None:
+    try:
+        return subprocess.check_output(["git", "rev-parse", "--short", "HEAD"], text=True).strip()
+    except (OSError, subprocess.CalledProcessError):
+        return None
+
+
+async def main(args):
+    assert settings.MODE == "BENCH" and settings.BENCH_DATABASE_URL, (
+        "Бенчмарк пересоздает БД, запускайте его с MODE=BENCH и отдельной BENCH_DATABASE_URL"
+    )
+    assert settings.BENCH_DATABASE_URL != settings.DATABASE_URL, "BENCH_DATABASE_URL совпадает с рабочей БД"
+    assert settings.BENCH_REDIS_URL, "Бенчмарк очищает кеш, задайте отдельный BENCH_REDIS_URL"
+    assert settings.BENCH_REDIS_URL not in (settings.REDIS_URL, settings.BROKER), (
+        "BENCH_REDIS_URL совпадает с рабочим Redis"
+    )
+    # задачи celery складываются в память процесса, письма и брокер не участвуют
+    celery.conf.broker_url = "memory://"
+    init_cache()
+    # БД пересоздается, ответы прошлого прогона в Redis больше не верны
+    await FastAPICache.clear()
+
+    await seed(args.users, args.events, args.courts, pending=args.requests)
+    report = {
+        "commit": git_commit(),
+        "started_at": datetime.now(UTC).isoformat(),
+        "params": vars(args),
+        "scenarios": {},
+    }
+    async with AsyncClient(transport=ASGITransport(app=app), base_url="https://test") as client:
+        for scenario in args.scenarios:
+            specs = requests_for(scenario, args.requests, args.users, args.events, args.courts)
+            report["scenarios"][scenario] = await run_scenario(client, specs, args.concurrency)
+    report["db_pool"] = pool_status()
+    await async_engine.dispose()
+
+    output = json.dumps(report, ensure_ascii=False, indent=2)
+    if args.output:
+        with open(args.output, "w") as file:
+            file.write(output)
+    print(output)
+
+
+def parse_args():
+    parser = argparse.ArgumentParser(description="Нагрузочный прогон горячих путей API")
+    parser.add_argument("--scenarios", nargs="+", choices=SCENARIOS, default=list(SCENARIOS))
+    parser.add_argument("--requests", type=int, default=200, help="запросов на сценарий")
+    parser.add_argument("--concurrency", type=int, default=10)
+    parser.add_argument("--users", type=int, default=200)
+    parser.add_argument("--events", type=int, default=20)
+    parser.add_argument("--courts", type=int, default=4)
+    parser.add_argument("--output", help="куда дополнительно записать JSON-отчет")
+    return parser.parse_args()
+
+
+if __name__ == "__main__":
+    asyncio.run(main(parse_args()))
@@ -0,0 +1,71 @@
+import logging
+
+from fastapi_cache import FastAPICache
+from fastapi_cache.backends.inmemory import InMemoryBackend
+from fastapi_cache.backends.redis import RedisBackend
+from redis import asyncio as aioredis
+from starlette.requests import Request
+
+from app.config import settings
+from app.database import on_commit
+
+logger = logging.getLogger(__name__)
+
+CACHE_PREFIX = "rondo-cache"
+# BENCH не трогает Redis прода: бенчмарк очищает кеш перед прогоном
+REDIS_URL = settings.BENCH_REDIS_URL if settings.MODE == "BENCH" else settings.REDIS_URL or settings.BROKER
+
+
+def path_key_builder(
+    func,
+    namespace: str = "",
+    request: Request | None = None,
+    response=None,
+    args=None,
+    kwargs=None,
+) -> str:
+    """Ключ из адреса запроса, чтобы запись можно было сбросить по адресу ресурса"""
+    return f"{FastAPICache.get_prefix()}:{namespace}:{request.url.path}:{request.query_params}"
+
+
+def init_cache():
+    if settings.MODE == "TEST":
+        backend = InMemoryBackend()
+    else:
+        redis = aioredis.from_url(REDIS_URL)
+        backend = RedisBackend(redis)
+    FastAPICache.init(
+        backend,
+        prefix=CACHE_PREFIX,
+        expire=settings.CACHE_EXPIRE,
+        key_builder=path_key_builder,
+    )
+
+
+async def invalidate(namespace: str, *paths: str):
+    """
+    Сбросить кеш ресурса: ответы по адресам paths,
+    а если адреса не переданы - весь namespace.
+    Сброс выполняется после коммита, чтобы параллельный запрос
+    не положил в кеш данные, прочитанные до него.
+    """
+    await on_commit(lambda: clear(namespace, *paths))
+
+
+async def clear(namespace: str, *paths: str):
+    try:
+        if not paths:
+            await FastAPICache.clear(namespace=namespace)
+        for path in paths:
+            await FastAPICache.clear(namespace=f"{namespace}:{path}")
+    except Exception as e:
+        # Запись уже сохранена, устаревший ответ проживет не дольше CACHE_EXPIRE
+        logger.warning(f"Не удалось сбросить кеш {namespace} {paths}: {str(e)}")
+
+
+async def invalidate_event(event_id: int | None = None):
+    """Сбросить список ивентов и, если передан id, страницу ивента"""
+    paths = ["/events/"]
+    if event_id is not None:
+        paths.append(f"/events/{event_id}")
+    await invalidate("events", *paths)
@@ -2,7 +2,7 @@ from pydantic_settings import BaseSettings, SettingsConfigDict
 from typing import Literal
 
 class Settings(BaseSettings):
-    MODE: Literal["DEV","TEST","PROD"]
+    MODE: Literal["DEV","TEST","PROD","BENCH"]
     DB_HOST: str
     DB_PORT: int
     DB_USER: str
@@ -18,20 +18,78 @@ class Settings(BaseSettings):
     TEST_DB_NAME: str
     TEST_DB_DRIVER: str
     TEST_DATABASE_URL: str
+    # Отдельная БД нагрузочного прогона (MODE=BENCH), бенчмарк ее пересоздает
+    BENCH_DATABASE_URL: str | None = None
+
+    # Пул соединений с БД (в TEST используется NullPool)
+    DB_POOL_SIZE: int = 10
+    DB_MAX_OVERFLOW: int = 10
+    DB_POOL_RECYCLE: int = 1800
+    DB_POOL_TIMEOUT: float = 30
+    DB_STATEMENT_CACHE_SIZE: int = 100
+    # None - логировать SQL только в DEV
+    DB_ECHO: bool | None = None
     
     SECRET_KEY: str
     HASH_ALGO: str
+    # Параметры argon2 (новые значения применяются к старым хешам при входе)
+    ARGON2_TIME_COST: int = 3
+    ARGON2_MEMORY_COST: int = 65536
+    ARGON2_PARALLELISM: int = 4
+    # Пул потоков для хеширования паролей и допустимая очередь сверх него
+    PASSWORD_HASH_WORKERS: int = 2
+    PASSWORD_HASH_QUEUE: int = 32
     BROKER: str
     BACKEND: str
     SMTP_SERVER: str
     SMTP_PORT: str
     SMTP_USERNAME: str
     SMTP_PASSWORD: str
+    # False - обычный SMTP без TLS, например локальный отладочный сервер
+    SMTP_SSL: bool = True
+    SMTP_TIMEOUT: float = 30
+    # Рассылки: писем в секунду и размер страницы получателей
+    MAIL_RATE_LIMIT: float = 10
+    MAIL_BATCH_SIZE: int = 500
     EMAIL_FROM: str
     shop_idd: str
     shop_secret: str
+    # Неоплаченная бронь корта живет COURT_HOLD_TTL минут, beat проверяет раз в интервал (сек)
+    COURT_HOLD_TTL: int = 15
+    COURT_HOLD_SWEEP_INTERVAL: int = 60
     TELEGRAM_TOKEN : str
     TELEGRAM_CHAT_ID: str
+
+    # Кеш ответов; без REDIS_URL используется Redis брокера
+    REDIS_URL: str | None = None
+    # Отдельный Redis нагрузочного прогона (MODE=BENCH), бенчмарк его очищает
+    BENCH_REDIS_URL: str | None = None
+    CACHE_EXPIRE: int = 60
+    # Кеш пользователей в get_current_user: TTL в секундах (0 - выключен), размер LRU процесса.
+    # По умолчанию кеш общий (Redis, в TEST - память) и сбрасывается сразу для всех процессов;
+    # USER_CACHE_REDIS=false - LRU процесса, только для запуска в один воркер
+    USER_CACHE_TTL: int = 30
+    USER_CACHE_SIZE: int = 1024
+    USER_CACHE_REDIS: bool = True
+    # Списки отдаются страницами: размер по умолчанию и максимальный limit
+    PAGE_SIZE: int = 50
+    PAGE_SIZE_MAX: int = 200
+    # Обложки ивентов: максимальный размер файла (байт), ширины WebP-копий и их качество
+    UPLOAD_MAX_SIZE: int = 10 * 1024 * 1024
+    IMAGE_VARIANT_WIDTHS: dict[str, int] = {"small": 320, "medium": 960}
+    IMAGE_WEBP_QUALITY: int = 80
+
+    # Платежный шлюз; в режимах TEST и BENCH всегда используется fake
+    PAYMENT_GATEWAY: Literal["yookassa", "fake"] = "yookassa"
+    # Задержка ответа fake-шлюза (сек), в бенчмарке имитирует поход в ЮKassa
+    PAYMENT_FAKE_DELAY: float = 0
+    PAYMENT_TIMEOUT: float = 10
+    PAYMENT_RETRIES: int = 2
+    PAYMENT_MAX_CONNECTIONS: int = 20
+    # Логи: общий уровень, уровни модулей (JSON, например {"app.dao": "DEBUG"}), формат
+    LOG_LEVEL: str = "INFO"
+    LOG_LEVELS: dict[str, str] = {"sqlalchemy.engine": "WARNING", "httpx": "WARNING"}
+    LOG_JSON: bool = True
     model_config = SettingsConfigDict(env_file=".env")
 
 
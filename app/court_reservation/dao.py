@@ -1,13 +1,138 @@
-from app.dao.base import BaseDAO
+from app.dao.base import BaseDAO, load_options
 from app.court_reservation.model import CourtReservation
-from app.court_reservation.schemas import CourtReservationCreate
-from sqlalchemy import select, and_, or_
-from datetime import datetime, timedelta
+from app.court_reservation.schemas import AdminCourtReservationresponse, CourtReservationCreate, UserInfo
+from sqlalchemy import delete, insert, select, update, and_, or_
+from sqlalchemy.exc import IntegrityError
+from datetime import date, datetime, timedelta
 from typing import List, Optional
+from app.database import commit, get_session
+from app.exceptions import CourtSlotTakenException
+from app.users.model import User
+
+# Корты сдаются почасово, time - час начала аренды
+OPEN_HOUR = 9
+CLOSE_HOUR = 20
+# Уникальный индекс слота: нарушение значит, что корт на этот час уже занят
+SLOT_INDEX = "ix_court_reservations_slot"
+UNIQUE_VIOLATION = "23505"
+
+
+def is_slot_taken(error: IntegrityError) -> bool:
+    """IntegrityError от индекса слота, а не от других ограничений (например, внешних ключей)"""
+    if getattr(error.orig, "sqlstate", None) != UNIQUE_VIOLATION:
+        return False
+    # имя ограничения есть у исходного исключения asyncpg
+    constraint = getattr(error.orig.__cause__, "constraint_name", None)
+    return constraint == SLOT_INDEX if constraint else SLOT_INDEX in str(error.orig)
+
 
 class CourtReservationDAO(BaseDAO):
     model = CourtReservation
 
-   
-    
-    
\ No newline at end of file
+    @classmethod
+    async def find_busy_slots(cls, date_from: date, date_to: date, court_id: int | None = None) -> set[tuple[int, date, int]]:
+        """Занятые слоты (корт, дата, час) за период одним запросом по диапазону дат"""
+        async with get_session() as session:
+            query = select(cls.model.court_id, cls.model.date, cls.model.time).where(
+                cls.model.date.between(date_from, date_to)
+            )
+            if court_id is not None:
+                query = query.where(cls.model.court_id == court_id)
+            result = await session.execute(query)
+            return {tuple(row) for row in result.all()}
+
+    @classmethod
+    async def find_all_admin(cls, date: date) -> list[dict]:
+        """Брони за день с контактами пользователя: один JOIN, только нужные колонки"""
+        columns = cls.columns_for(AdminCourtReservationresponse)
+        user_fields = list(UserInfo.model_fields)
+        async with get_session() as session:
+            query = (
+                select(*columns, *(getattr(User, name) for name in user_fields))
+                .join(User, User.id == cls.model.user_id)
+                .where(cls.model.date == date)
+                .order_by(cls.model.time)
+            )
+            result = await session.execute(query)
+            items = []
+            for row in result:
+                item = dict(zip((column.key for column in columns), row[:len(columns)]))
+                item["user"] = dict(zip(user_fields, row[len(columns):]))
+                items.append(item)
+            return items
+
+    @classmethod
+    async def book(cls, **data):
+        """
+        Занять слот одной вставкой. Занятость проверяет уникальный индекс
+        (court_id, date, time), поэтому двое не получат один и тот же час.
+        """
+        async with get_session() as session:
+            query = insert(cls.model).values(**data).returning(cls.model)
+            try:
+                # savepoint: ошибка не откатывает общую сессию запроса
+                async with session.begin_nested():
+                    result = await session.execute(query)
+            except IntegrityError as e:
+                if is_slot_taken(e):
+                    raise CourtSlotTakenException
+                raise
+            reservation = result.scalar()
+            await commit(session)
+            return reservation
+
+    @classmethod
+    async def move(cls, reservation_id: int, court_id: int, date: date, time: int):
+        """Перенести бронь на другой слот одним UPDATE, занятый слот -> 409"""
+        async with get_session() as session:
+            query = (
+                update(cls.model)
+                .where(cls.model.id == reservation_id)
+                .values(court_id=court_id, date=date, time=time)
+                .returning(cls.model)
+            )
+            try:
+                async with session.begin_nested():
+                    result = await session.execute(query)
+            except IntegrityError as e:
+                if is_slot_taken(e):
+                    raise CourtSlotTakenException
+                raise
+            reservation = result.scalar()
+            await commit(session)
+            return reservation
+
+    @classmethod
+    async def confirm_payment(cls, reservation_id: int, payment_id: str, load=None):
+        """
+        Подтвердить оплату одним условным UPDATE. Повторный вебхук с тем же
+        payment_id ничего не меняет и возвращает None.
+        """
+        async with get_session() as session:
+            query = (
+                update(cls.model)
+                .where(
+                    cls.model.id == reservation_id,
+                    cls.model.payment_id == payment_id,
+                    cls.model.is_confirmed.is_not(True),
+                )
+                .values(is_confirmed=True)
+                .returning(cls.model)
+                .options(*load_options(load))
+            )
+            result = await session.execute(query)
+            reservation = result.scalar()
+            await commit(session)
+            return reservation
+
+    @classmethod
+    async def expire_holds(cls, created_before: datetime) -> int:
+        """Удалить все неоплаченные брони старше created_before одним DELETE, вернуть их число"""
+        async with get_session() as session:
+            query = delete(cls.model).where(
+                cls.model.is_confirmed.is_not(True),
+                cls.model.created_at < created_before,
+            )
+            result = await session.execute(query)
+            await commit(session)
+            return result.rowcount
@@ -1,10 +1,20 @@
-from sqlalchemy import Column, Integer, String, DateTime, ForeignKey, Boolean, Date
+from sqlalchemy import Column, Integer, String, DateTime, ForeignKey, Boolean, Date, Index, text
 from sqlalchemy.orm import relationship
 from app.database import Base
 from datetime import datetime, date
 
 class CourtReservation(Base):
     __tablename__ = "court_reservations"
+    __table_args__ = (
+        # один слот (корт, дата, час) - одна бронь, проверку делает сама БД
+        Index("ix_court_reservations_slot", "court_id", "date", "time", unique=True),
+        # брони за день и занятые слоты за период
+        Index("ix_court_reservations_date", "date"),
+        # "мои брони" постранично по (date, id)
+        Index("ix_court_reservations_user_confirmed", "user_id", "is_confirmed", "date", "id"),
+        # expire_holds: неоплаченных броней мало, индекс только по ним
+        Index("ix_court_reservations_unpaid_created", "created_at", postgresql_where=text("is_confirmed IS NOT TRUE")),
+    )
 
     id = Column(Integer, primary_key=True, index=True)
     court_id = Column(Integer, ForeignKey("courts.id"))
@@ -15,8 +25,8 @@ class CourtReservation(Base):
     is_confirmed = Column(Boolean, default=False)
     payment_id = Column(String, nullable=True)
     is_social = Column(Boolean, default=False, nullable=True)
-    court = relationship("Court", back_populates="reservations", lazy="selectin")
-    user = relationship("User", back_populates="court_reservations", lazy="selectin")
+    court = relationship("Court", back_populates="reservations", lazy="raise")
+    user = relationship("User", back_populates="court_reservations", lazy="raise")
 
     def __repr__(self):
         return f"<CourtReservation(id={self.id}, court_id={self.court_id}, user_id={self.user_id}, date={self.date}, time={self.time})>"
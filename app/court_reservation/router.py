@@ -1,59 +1,112 @@
-from fastapi import APIRouter, Depends, HTTPException, Request
+import logging
+
+from fastapi import APIRouter, Depends, HTTPException, Query, Request
 from sqlalchemy.ext.asyncio import AsyncSession
-from app.court_reservation.dao import CourtReservationDAO
+from app.court_reservation.dao import CLOSE_HOUR, OPEN_HOUR, CourtReservationDAO
 from app.court_reservation.model import CourtReservation
 from app.courts.dao import CourtDAO
 from app.users.model import User
-from app.court_reservation.schemas import AdminListCourtReservation, ListCourtReservation, CourtReservationCreate, CourtReservationUpdate, CourtReservation_response, CourtReservationCreateByAdmin, CourtResrvationPayment, CourtReservationUpdateDate 
+from app.court_reservation.schemas import AdminListCourtReservation, ListCourtReservation, CourtReservationCreate, CourtReservationUpdate, CourtReservation_response, CourtReservationCreateByAdmin, CourtResrvationPayment, CourtReservationUpdateDate, CourtAvailabilityGrid
 from app.users.dependencies import get_current_user
-from datetime import date, datetime
+from datetime import date, datetime, timedelta
 from app.users.dao import UsersDao
-from app.tasks.tasks import cancel_if_not_confirmed, send_about_registration_on_court, send_notification_telegram
+from app.tasks.tasks import send_about_registration_on_court, send_notification_telegram
 from datetime import date
-from app.payments.service import create_payment, verify_rental_signature
-import json
+from app.payments.service import PaymentGatewayError, payment_gateway, verify_rental_signature
 from app.config import settings
+from app.database import commit_now, on_commit
+from app.pagination import PageParams, page_params
+
+logger = logging.getLogger(__name__)
+
 router = APIRouter(
     prefix="/court_reservations",
     tags=["court_reservations"]
 )
-from yookassa import Configuration, Payment
 
 @router.get("/all/{date}", response_model=ListCourtReservation | None)
 async def get_court_reservations(
     date: date):
-    courts_reservations = await CourtReservationDAO.find_all(date=date)
+    courts_reservations = await CourtReservationDAO.find_all_columns(CourtReservation_response, date=date)
     return {"items": courts_reservations, "total": len(courts_reservations)}
 
 @router.get("/all_admin/{date}", response_model=AdminListCourtReservation | None)
 async def get_court_reservations(
     date: date):
-    courts_reservations = await CourtReservationDAO.find_all(date=date,order_by=CourtReservation.time)
+    courts_reservations = await CourtReservationDAO.find_all_admin(date)
     return {"items": courts_reservations, "total": len(courts_reservations)}
 
 
+MAX_AVAILABILITY_DAYS = 31
+
+@router.get("/availability", response_model=CourtAvailabilityGrid)
+async def get_availability(
+    date_from: date = Query(alias="from"),
+    date_to: date = Query(alias="to"),
+    court_id: int | None = None,
+):
+    """Сетка свободных часов корт x дата x час за период"""
+    if date_to < date_from:
+        raise HTTPException(status_code=400, detail="Дата окончания раньше даты начала")
+    days_count = (date_to - date_from).days + 1
+    if days_count > MAX_AVAILABILITY_DAYS:
+        raise HTTPException(status_code=400, detail=f"Период не может быть больше {MAX_AVAILABILITY_DAYS} дней")
+    filter_by = {"id": court_id} if court_id is not None else {}
+    courts = await CourtDAO.find_schedule_info(**filter_by)
+    if court_id is not None and not courts:
+        raise HTTPException(status_code=404, detail="Корт не найден")
+    busy = await CourtReservationDAO.find_busy_slots(date_from, date_to, court_id=court_id)
+    days = [date_from + timedelta(days=i) for i in range(days_count)]
+    hours = range(OPEN_HOUR, CLOSE_HOUR + 1)
+    today = date.today()
+    grid = []
+    for court in courts:
+        closed_days = set(court["not_available_dates"] or [])
+        court_days = {}
+        for day in days:
+            if not court["is_available"] or day in closed_days or day < today:
+                court_days[day] = "0" * len(hours)
+            else:
+                court_days[day] = "".join(
+                    "0" if (court["id"], day, hour) in busy else "1" for hour in hours
+                )
+        grid.append({"court_id": court["id"], "days": court_days})
+    return {
+        "date_from": date_from,
+        "date_to": date_to,
+        "first_hour": OPEN_HOUR,
+        "last_hour": CLOSE_HOUR,
+        "courts": grid,
+    }
+
+
 @router.post("/temporary", response_model=CourtResrvationPayment)
 async def create_temporary_reservation(
     data: CourtReservationCreate,
     current_user: User = Depends(get_current_user)
 ):
-    if data.time < 9 or data.time > 20:
-        raise HTTPException(status_code=400, detail="Время должно быть в диапазоне от 9 до 20")
+    if data.time < OPEN_HOUR or data.time > CLOSE_HOUR:
+        raise HTTPException(status_code=400, detail=f"Время должно быть в диапазоне от {OPEN_HOUR} до {CLOSE_HOUR}")
     if data.date < date.today():
         raise HTTPException(status_code=400, detail="Дата должна быть больше текущей")
     court = await CourtDAO.find_one_or_none(id=data.court_id)
     if not court:
         raise HTTPException(status_code=404, detail="Корт не найден")
-    is_exists = await CourtReservationDAO.find_one_or_none(date=data.date, time=data.time, court_id=data.court_id)
-    if is_exists:
-        raise HTTPException(status_code=400, detail="Время уже занято")
     if current_user.first_name == None or current_user.last_name == None or current_user.first_name == "" or current_user.last_name == "":
         raise HTTPException(status_code=400, detail="Укажите имя и фамилию в профиле")
-    reservation = await CourtReservationDAO.add(user_id=current_user.id, date=data.date, time=data.time, court_id=data.court_id)
-    payment = create_payment(amount=court.price, rental_id=reservation.id, url=f"https://skkrondo.ru/courts", description=f"Оплата бронирования на корт {court.name} {data.date} {data.time}:00", email=current_user.email)
+    reservation = await CourtReservationDAO.book(user_id=current_user.id, date=data.date, time=data.time, court_id=data.court_id)
+    # Бронь коммитим до похода в платежный сервис: на время его повторов
+    # не держим ни блокировку индекса слота, ни соединение из пула
+    await commit_now()
+    try:
+        payment = await payment_gateway.create_payment(amount=court.price, rental_id=reservation.id, url=f"https://skkrondo.ru/courts", description=f"Оплата бронирования на корт {court.name} {data.date} {data.time}:00", email=current_user.email)
+    except PaymentGatewayError:
+        # Бронь уже закоммичена, снимаем ее сами, чтобы слот не остался занятым
+        await CourtReservationDAO.delete(id=reservation.id)
+        await commit_now()
+        raise HTTPException(status_code=502, detail="Платежный сервис недоступен, попробуйте позже")
     await CourtReservationDAO.update(id=reservation.id, field="payment_id", data=payment[1])
-    print(payment[1])
-    cancel_if_not_confirmed.apply_async((reservation.id,), countdown=60*15)
+    logger.debug("Создан платеж %s для брони %s", payment[1], reservation.id)
     return {"payment_url": payment[0]}
      
 
@@ -62,7 +115,9 @@ async def confirm_reservation(
     reservation_id: int,
     current_user: User = Depends(get_current_user)
 ):
-    reservation = await CourtReservationDAO.find_one_or_none(id=reservation_id)
+    reservation = await CourtReservationDAO.find_one_or_none(
+        id=reservation_id, load=[CourtReservation.user, CourtReservation.court]
+    )
     if not reservation:
         raise HTTPException(status_code=404, detail="Бронирование не найдено")
     if current_user.admin_status != "admin":
@@ -75,10 +130,19 @@ async def confirm_reservation(
     return result
 @router.get("/my_reservations", response_model=ListCourtReservation)
 async def get_my_reservations(
+    page: PageParams = Depends(page_params),
     current_user: User = Depends(get_current_user)
 ):
-    reservations = await CourtReservationDAO.find_all(user_id=current_user.id, is_confirmed=True, order_by=CourtReservation.date)
-    return {"items": reservations, "total": len(reservations)}
+    reservations = await CourtReservationDAO.find_page(
+        page.limit, page.after, order_by=CourtReservation.date, schema=CourtReservation_response,
+        user_id=current_user.id, is_confirmed=True,
+    )
+    if page.after is None and reservations.next_cursor is None:
+        total = len(reservations.items)
+    else:
+        # total - все подтвержденные брони пользователя, а не только эта страница
+        total = await CourtReservationDAO.count(user_id=current_user.id, is_confirmed=True)
+    return {"items": reservations.items, "total": total, "next_cursor": reservations.next_cursor}
 
 @router.delete("/cancel/{reservation_id}", response_model=CourtReservation_response)
 async def delete_reservation(
@@ -99,7 +163,9 @@ async def delete_reservation(
 async def get_my_temporary_reservations(
     current_user: User = Depends(get_current_user)
 ):
-    reservations = await CourtReservationDAO.find_all(user_id=current_user.id, is_confirmed=False)
+    reservations = await CourtReservationDAO.find_all_columns(
+        CourtReservation_response, user_id=current_user.id, is_confirmed=False
+    )
     return {"items": reservations, "total": len(reservations)}
 
 @router.delete("/cancel_by_admin/{reservation_id}")
@@ -126,40 +192,60 @@ async def create_by_admin(
     if current_user.admin_status != "admin":
         raise HTTPException(status_code=403, detail="Недостаточно прав")
 
-    is_exists = await CourtReservationDAO.find_one_or_none(date=data.date, time=data.time, court_id=data.court_id)
-    if is_exists:
-        raise HTTPException(status_code=400, detail="Время уже занято")
     user = await UsersDao.find_one_or_none(email=data.email) 
     if not user:
         raise HTTPException(status_code=404, detail="Пользователь не найден")
-    reservation = await CourtReservationDAO.add(user_id=user.id, date=data.date, time=data.time, court_id=data.court_id, is_confirmed=True)
+    reservation = await CourtReservationDAO.book(user_id=user.id, date=data.date, time=data.time, court_id=data.court_id, is_confirmed=True)
     return reservation
 
 
 @router.post("/yookassa/webhook")
 async def yookassa_webhook(request: Request):
+    """
+    Подтверждение оплаты по уведомлению ЮKassa. rental_id в metadata подписан
+    нами при создании платежа, поэтому повторно запрашивать платеж не нужно.
+    Повторы уведомлений гасит условный UPDATE по payment_id.
+    """
     data = await request.json()
-    print("Получен вебхук от ЮKassa:", data)
 
-    # Проверяем наличие необходимых полей
-    if not data.get("object"):
+    payment = data.get("object")
+    if not payment:
         raise HTTPException(status_code=400, detail="Invalid webhook data")
+    if data.get("event") != "payment.succeeded" or payment.get("status") != "succeeded":
+        return {"status": "ignored"}
 
-    payment = data["object"]
-    try:
-        payment_id = payment.get("id")
-        pay = Payment.find_one(payment_id)
-        payment_data = json.loads(pay.json())
-        if payment_data["status"] != "succeeded":
-            return {"status": "ignored"}
-        rental_id = payment_data["metadata"]["rental_id"]
-        reservation = await CourtReservationDAO.update(id=int(rental_id), field="is_confirmed", data=True)
-        send_about_registration_on_court.delay(to=reservation.user.email, name=reservation.user.first_name, last_name = reservation.user.last_name,  court=reservation.court.name, time_start=reservation.time)
-        send_notification_telegram.delay(data=reservation.date, time=reservation.time, first_name=reservation.user.first_name, last_name=reservation.user.last_name)
-        return {"status": "success"}
-    except Exception as e:
-        print("Ошибка при получении id и metadata:", e)
+    metadata = payment.get("metadata") or {}
+    payment_id = payment.get("id")
+    rental_id = metadata.get("rental_id")
+    signature = metadata.get("rental_signature")
+    if not payment_id or not rental_id or not signature:
         raise HTTPException(status_code=400, detail="Invalid webhook data")
+    if not verify_rental_signature(rental_id, signature, settings.SECRET_KEY):
+        raise HTTPException(status_code=403, detail="Invalid signature")
+
+    reservation = await CourtReservationDAO.confirm_payment(
+        int(rental_id), payment_id, load=[CourtReservation.user, CourtReservation.court]
+    )
+    if not reservation:
+        current = await CourtReservationDAO.find_by_id(int(rental_id))
+        if current and current["is_confirmed"] and current["payment_id"] == payment_id:
+            return {"status": "duplicate"}
+        # оплачена бронь, которой уже нет (сняла expire_court_holds) или у нее другой
+        # платеж: деньги получены, а слота нет - нужен возврат или ручная бронь
+        logger.error(
+            "Оплата %s за бронь %s не подтверждена: %s",
+            payment_id, rental_id, "брони нет" if not current else "бронь с другим платежом",
+            extra={"payment_id": payment_id, "rental_id": rental_id},
+        )
+        return {"status": "missing" if not current else "mismatch"}
+
+    async def notify():
+        send_about_registration_on_court.delay(to=reservation.user.email, name=reservation.user.first_name, last_name=reservation.user.last_name, court=reservation.court.name, time_start=reservation.time)
+        send_notification_telegram.delay(data=reservation.date, time=reservation.time, first_name=reservation.user.first_name, last_name=reservation.user.last_name)
+
+    # письма уходят только после фиксации подтверждения
+    await on_commit(notify)
+    return {"status": "success"}
     
 @router.put("/update/{reservation_id}", response_model=CourtReservation_response)
 async def update_reservation(
@@ -177,14 +263,9 @@ async def update_reservation(
         raise HTTPException(status_code=403, detail="Недостаточно прав")
     if data.date < date.today():
         raise HTTPException(status_code=400, detail="Дата должна быть больше текущей")
-    if data.time < 9 or data.time > 20:
-        raise HTTPException(status_code=400, detail="Время должно быть в диапазоне от 9 до 20")
-    is_exists = await CourtReservationDAO.find_one_or_none(date=data.date, time=data.time, court_id=data.court_id)
-    if is_exists:
-        raise HTTPException(status_code=400, detail="Время уже занято")
-    await CourtReservationDAO.update(id=reservation_id, field="date", data=data.date)
-    await CourtReservationDAO.update(id=reservation_id, field="court_id", data=data.court_id)
-    result = await CourtReservationDAO.update(id=reservation_id, field="time", data=data.time)
+    if data.time < OPEN_HOUR or data.time > CLOSE_HOUR:
+        raise HTTPException(status_code=400, detail=f"Время должно быть в диапазоне от {OPEN_HOUR} до {CLOSE_HOUR}")
+    result = await CourtReservationDAO.move(reservation_id, court_id=data.court_id, date=data.date, time=data.time)
     return result
 
 @router.put("/update_social/{reservation_id}", response_model=CourtReservation_response)
@@ -72,9 +72,23 @@ class CourtResrvationPayment(BaseModel):
 class CourtReservationDelete(BaseModel):
     id: int
 
+class CourtAvailability(BaseModel):
+    court_id: int
+    # по строке на дату: символ на каждый час от first_hour, "1" - свободно, "0" - занято
+    days: dict[date, str]
+
+class CourtAvailabilityGrid(BaseModel):
+    date_from: date
+    date_to: date
+    first_hour: int
+    last_hour: int
+    courts: list[CourtAvailability]
+
 class ListCourtReservation(BaseModel):
     items: list[CourtReservation_response]
     total: int
+    # есть только у постраничных списков
+    next_cursor: str | None = None
 
 class AdminListCourtReservation(BaseModel):
     items: list[AdminCourtReservationresponse]
@@ -1,14 +1,14 @@
 from app.dao.base import BaseDAO
 from app.courts.model import Court
 from sqlalchemy import select
-from app.database import async_session_maker 
+from app.database import commit, get_session
 from datetime import datetime, date
 
 class CourtDAO(BaseDAO):
     model = Court
     @classmethod
     async def update_court(cls, court_id: int, name: str, description: str | None, price: float, is_available: bool, not_available_dates: list[datetime] | None):
-        async with async_session_maker() as session:
+        async with get_session() as session:
             query = select(cls.model).where(cls.model.id == court_id)
             result = await session.execute(query)
             court = result.scalars().first()
@@ -24,12 +24,22 @@ class CourtDAO(BaseDAO):
                 court.is_available = is_available
             if not_available_dates is not None:
                 court.not_available_dates = not_available_dates
-            await session.commit()
+            await commit(session)
             await session.refresh(court)
             return court
     @classmethod
+    async def find_schedule_info(cls, **filter_by):
+        """Только поля, нужные для сетки занятости, без загрузки броней"""
+        async with get_session() as session:
+            query = select(
+                cls.model.id, cls.model.is_available, cls.model.not_available_dates
+            ).filter_by(**filter_by).order_by(cls.model.id)
+            result = await session.execute(query)
+            return result.mappings().all()
+
+    @classmethod
     async def add_not_available_date(cls, court_id: int, not_available_date: date):
-        async with async_session_maker() as session:
+        async with get_session() as session:
             query = select(cls.model).where(cls.model.id == court_id)
             result = await session.execute(query)
             court = result.scalars().first()
@@ -39,7 +49,7 @@ class CourtDAO(BaseDAO):
                 court.not_available_dates = []
             if not_available_date not in court.not_available_dates:     
                 court.not_available_dates = court.not_available_dates + [not_available_date]
-            await session.commit()
+            await commit(session)
             await session.refresh(court)
             return court
             
@@ -15,7 +15,7 @@ class Court(Base):
     updated_at: Mapped[datetime] = mapped_column(DateTime, default=datetime.now, onupdate=datetime.now)
     reservations: Mapped[list["CourtReservation"]] = relationship(
         back_populates="court", 
-        lazy="selectin", 
+        lazy="raise", 
         cascade="all, delete"
     )
     def __repr__(self):
@@ -13,5 +13,5 @@ class Coworking(Base):
     description: Mapped[str] = mapped_column(Text, nullable=True)
     is_available: Mapped[bool] = mapped_column(Boolean, default=True)
     reservations: Mapped[list["CoworkingReservation"]] = relationship(
-        back_populates="coworking", lazy="selectin", cascade="all, delete"
+        back_populates="coworking", lazy="raise", cascade="all, delete"
     )
\ No newline at end of file
@@ -1,4 +1,7 @@
 from fastapi import APIRouter, Depends, HTTPException, status
+from fastapi_cache.decorator import cache
+
+from app.cache import invalidate
 from app.coworking.dao import CoworkingDAO
 from app.coworking.schemas import CoworkingCreate, CoworkingRead, CoworkingUpdate, CoworkingList
 from app.users.dependencies import get_current_user
@@ -8,9 +11,10 @@ from app.users.model import User
 router = APIRouter(prefix="/coworking", tags=["Коворкинг"])
 
 @router.get("/get_all_coworking", response_model=CoworkingList)
+@cache(namespace="coworking")
 async def get_all_coworking():
-    coworking = await CoworkingDAO.find_all()
-    return {"items":coworking}
+    coworking = await CoworkingDAO.find_all_columns(CoworkingRead)
+    return CoworkingList(items=[CoworkingRead.model_validate(item) for item in coworking])
 
 
 @router.post("/", response_model=CoworkingRead)
@@ -20,7 +24,9 @@ async def create_coworking(
 ):
     if not current_user.admin_status=="admin":
         raise HTTPException(status_code=status.HTTP_403_FORBIDDEN, detail="У вас нет прав на создание коворкинга")
-    return await CoworkingDAO.add(name=coworking.name, description=coworking.description, is_available=coworking.is_available)
+    new_coworking = await CoworkingDAO.add(name=coworking.name, description=coworking.description, is_available=coworking.is_available)
+    await invalidate("coworking")
+    return new_coworking
 
 @router.put("/{coworking_id}", response_model=CoworkingRead)
 async def update_coworking(
@@ -33,7 +39,9 @@ async def update_coworking(
     coworking_data = await CoworkingDAO.find_one_or_none(id=coworking_id)
     if not coworking_data:
         raise HTTPException(status_code=status.HTTP_404_NOT_FOUND, detail="Коворкинг не найден")
-    return await CoworkingDAO.update_coworking(coworking_id, name=coworking.name, description=coworking.description, is_available=coworking.is_available)
+    updated = await CoworkingDAO.update_coworking(coworking_id, name=coworking.name, description=coworking.description, is_available=coworking.is_available)
+    await invalidate("coworking")
+    return updated
 
 @router.delete("/{coworking_id}")
 async def delete_coworking(
@@ -46,12 +54,13 @@ async def delete_coworking(
     if not coworking_data:
         raise HTTPException(status_code=status.HTTP_404_NOT_FOUND, detail="Коворкинг не найден")
     await CoworkingDAO.delete(coworking_id)
+    await invalidate("coworking")
     return {"message":"Коворкинг удален"}
 
 
 @router.get("/{coworking_id}", response_model=CoworkingRead)
 async def get_coworking(coworking_id: int):
-    coworking = await CoworkingDAO.find_one_or_none(id=coworking_id)
+    coworking = await CoworkingDAO.find_one_columns(CoworkingRead, id=coworking_id)
     if not coworking:
         raise HTTPException(status_code=status.HTTP_404_NOT_FOUND, detail="Коворкинг не найден")
     return coworking
@@ -1,6 +1,6 @@
 from app.database import Base
 from sqlalchemy.orm import Mapped, mapped_column
-from sqlalchemy import String, Text, Boolean, DateTime, ForeignKey
+from sqlalchemy import String, Text, Boolean, DateTime, ForeignKey, Index, text
 from datetime import datetime
 from sqlalchemy.orm import relationship
 from app.users.model import User
@@ -11,11 +11,18 @@ if TYPE_CHECKING:
     from app.coworking.model import Coworking
 class CoworkingReservation(Base):
     __tablename__ = "coworking_reservation"
+    __table_args__ = (
+        # история броней пользователя постранично
+        Index("ix_coworking_reservation_user_id", "user_id", "id"),
+        # открытые брони (end_time IS NULL) - по пользователю и по месту
+        Index("ix_coworking_reservation_open_user", "user_id", postgresql_where=text("end_time IS NULL")),
+        Index("ix_coworking_reservation_open_coworking", "coworking_id", postgresql_where=text("end_time IS NULL")),
+    )
 
     id: Mapped[int] = mapped_column(primary_key=True, index=True)
     coworking_id: Mapped[int] = mapped_column(ForeignKey("coworking.id"))
     user_id: Mapped[int] = mapped_column(ForeignKey("users.id"))
     start_time: Mapped[datetime|None] = mapped_column(DateTime(timezone=True))
     end_time: Mapped[datetime|None] = mapped_column(DateTime(timezone=True))
-    user: Mapped["User"] = relationship("User", back_populates="coworking_reservations", lazy="selectin", cascade="all, delete")
-    coworking: Mapped["Coworking"] = relationship("Coworking", back_populates="reservations", lazy="selectin", cascade="all, delete")
+    user: Mapped["User"] = relationship("User", back_populates="coworking_reservations", lazy="raise", cascade="all, delete")
+    coworking: Mapped["Coworking"] = relationship("Coworking", back_populates="reservations", lazy="raise", cascade="all, delete")
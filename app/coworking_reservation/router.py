@@ -1,8 +1,11 @@
 from fastapi import APIRouter, Depends, HTTPException
 from pytz import timezone
+from app.cache import invalidate
 from app.coworking.dao import CoworkingDAO
 from app.coworking_reservation.schemas import CoworkingReservationCreate, CoworkingReservationListAdmin, CoworkingReservationRead, CoworkingReservationList, CoworkingReservationClose, CoworkingReservationCloseAdmin
 from app.coworking_reservation.dao import CoworkingReservationDAO
+from app.coworking_reservation.model import CoworkingReservation
+from app.pagination import PageParams, page_params
 from app.users.router import get_current_user
 from app.users.model import User
 from app.coworking.model import Coworking
@@ -43,6 +46,7 @@ async def create_coworking_reservation(
         name = None,
         description = None
     )
+    await invalidate("coworking")
     return {"message": "Бронь успешно создана"}
 
 @router.post("/close")
@@ -68,16 +72,21 @@ async def close_coworking_reservation(
         description = None,
         is_available = True
     )
+    await invalidate("coworking")
     return {"message": "Бронь закрыта"}
 
 @router.get("/get_all_reservations_by_user", response_model=CoworkingReservationList)
 async def get_coworking_reservations(
+    page: PageParams = Depends(page_params),
     current_user: User = Depends(get_current_user)
 ):
-    reservations = await CoworkingReservationDAO.find_all(
-        user_id = current_user.id
+    reservations = await CoworkingReservationDAO.find_page(
+        page.limit,
+        page.after,
+        user_id = current_user.id,
+        load = [CoworkingReservation.coworking]
     )
-    return {"items": reservations}
+    return {"items": reservations.items, "next_cursor": reservations.next_cursor}
 
 
 
@@ -87,7 +96,8 @@ async def get_all_reservations_active_by_user(
 ):
     reservations = await CoworkingReservationDAO.find_all(
         end_time = None,
-        user_id = current_user.id
+        user_id = current_user.id,
+        load = [CoworkingReservation.coworking]
     )
     return {"items": reservations}
 
@@ -98,7 +108,8 @@ async def get_all_reservations_active_admin(
     if not current_user.admin_status=="admin":
         raise HTTPException(status_code=400, detail="У вас нет прав на просмотр броней")
     reservations = await CoworkingReservationDAO.find_all(
-        end_time = None
+        end_time = None,
+        load = [CoworkingReservation.coworking, CoworkingReservation.user]
     )
     return {"items": reservations}
 
@@ -126,4 +137,5 @@ async def close_admin(
         name = None,
         description = None
     )   
+    await invalidate("coworking")
     return {"message": "Бронь закрыта"}
\ No newline at end of file
@@ -17,6 +17,7 @@ class CoworkingReservationRead(BaseModel):
 
 class CoworkingReservationList(BaseModel):
     items: List[CoworkingReservationRead]
+    next_cursor: str | None = None
 
 class CoworkingReservationClose(BaseModel):
     coworking_id: int
@@ -6,7 +6,7 @@ async def main():
     await UsersDao.add(
         email="root",
         username="root",
-        hashed_password=get_password_hash("root"),
+        hashed_password=await get_password_hash("root"),
         is_active=True,
         admin_status="admin",
     )
@@ -1,6 +1,21 @@
-from sqlalchemy import delete, func, insert, select, update
+import logging
+from collections.abc import Mapping
 
-from app.database import async_session_maker
+from sqlalchemy import delete, func, insert, select, tuple_, update
+from sqlalchemy.orm import selectinload
+
+from app.database import commit, get_session, rollback
+from app.pagination import Page, decode_cursor, encode_cursor
+
+logger = logging.getLogger(__name__)
+
+
+def load_options(load) -> list:
+    """
+    Связи, которые нужно подгрузить вместе с записью. Модели по умолчанию
+    ничего не грузят (lazy="raise"), каждый запрос сам перечисляет то, что отдает.
+    """
+    return [selectinload(relation) for relation in load or ()]
 
 
 class BaseDAO:
@@ -8,23 +23,90 @@ class BaseDAO:
 
     @classmethod
     async def find_by_id(cls, model_id: int):
-        async with async_session_maker() as session:
+        async with get_session() as session:
             query = select(cls.model.__table__.columns).filter_by(id=model_id)
             result = await session.execute(query)
 
             return result.mappings().one_or_none()
 
     @classmethod
-    async def find_one_or_none(cls, **kwargs):
-        async with async_session_maker() as session:
-            query = select(cls.model).filter_by(**kwargs)
+    def columns_for(cls, schema) -> list:
+        """Колонки модели, которые объявлены полями схемы ответа"""
+        columns = cls.model.__table__.columns
+        return [columns[name] for name in schema.model_fields if name in columns]
+
+    @classmethod
+    async def find_one_columns(cls, schema, **filter_by):
+        """Как find_one_or_none, но выбирает только поля схемы и возвращает mapping без ORM-объекта"""
+        async with get_session() as session:
+            query = select(*cls.columns_for(schema)).filter_by(**filter_by)
+            result = await session.execute(query)
+            return result.mappings().one_or_none()
+
+    @classmethod
+    async def find_all_columns(cls, schema, order_by=None, **filter_by):
+        """
+        Список только для чтения: выбирает колонки, нужные схеме ответа,
+        и отдает строки как mapping - без identity map и загрузчиков связей.
+        """
+        async with get_session() as session:
+            query = select(*cls.columns_for(schema)).filter_by(**filter_by)
+            if order_by is not None:
+                query = query.order_by(order_by)
+            result = await session.execute(query)
+            return result.mappings().all()
+
+    @classmethod
+    def page_keys(cls, order_by=None) -> list:
+        """Ключ keyset-пагинации: колонка сортировки и id, чтобы порядок был однозначным"""
+        if order_by is None or order_by is cls.model.id:
+            return [cls.model.id]
+        return [order_by, cls.model.id]
+
+    @classmethod
+    async def find_page(cls, limit: int | None, after: str | None = None, order_by=None, schema=None, load=None, **filter_by) -> Page:
+        """
+        Страница списка по курсору: WHERE (order_by, id) > after ORDER BY order_by, id.
+        Запрос идет по индексу и не зависит от номера страницы, в отличие от OFFSET.
+        С schema строки выбираются как в find_all_columns, иначе - ORM-объекты с load.
+        limit=None - весь список без курсора.
+        """
+        keys = cls.page_keys(order_by)
+        async with get_session() as session:
+            if schema is not None:
+                columns = cls.columns_for(schema)
+                names = {column.key for column in columns}
+                query = select(*columns, *(key for key in keys if key.key not in names))
+            else:
+                query = select(cls.model).options(*load_options(load))
+            query = query.filter_by(**filter_by)
+            if after:
+                query = query.where(tuple_(*keys) > tuple(decode_cursor(after, keys)))
+            query = query.order_by(*keys)
+            if limit is not None:
+                # лишняя запись показывает, есть ли следующая страница
+                query = query.limit(limit + 1)
+            result = await session.execute(query)
+            rows = result.mappings().all() if schema is not None else result.scalars().all()
+
+        if limit is None or len(rows) <= limit:
+            return Page(list(rows))
+        items = list(rows[:limit])
+        last = items[-1]
+        values = [last[key.key] if isinstance(last, Mapping) else getattr(last, key.key) for key in keys]
+        return Page(items, encode_cursor(values))
+
+    @classmethod
+    async def find_one_or_none(cls, load=None, **kwargs):
+        async with get_session() as session:
+            query = select(cls.model).filter_by(**kwargs).options(*load_options(load))
             result = await session.execute(query)
             return result.scalars().one_or_none()
 
     @classmethod
-    async def find_all(cls, order_by=None, **filter_by):
-        async with async_session_maker() as session:
-            query = select(cls.model).filter_by(**filter_by)
+    async def find_all(cls, order_by=None, load=None, **filter_by):
+        async with get_session() as session:
+            query = select(cls.model).filter_by(**filter_by).options(*load_options(load))
             if order_by:
                 query = query.order_by(order_by)
             result = await session.execute(query)
@@ -32,34 +114,35 @@ class BaseDAO:
 
     @classmethod
     async def add(cls, **data):
-        async with async_session_maker() as session:
+        async with get_session() as session:
             try:
-                print(f"Попытка добавления записи в таблицу {cls.model.__tablename__}")
-                print(f"Данные для вставки: {data}")
+                logger.debug("Попытка добавления записи в таблицу %s", cls.model.__tablename__)
+                logger.debug("Данные для вставки: %s", data)
                 query = insert(cls.model).values(**data).returning(cls.model)
-                print(f"SQL запрос: {query}")
+                logger.debug("SQL запрос: %s", query)
                 result = await session.execute(query)
-                await session.commit()
+                await commit(session)
                 return result.scalar()
             except Exception as e:
-                print(f"Ошибка при добавлении записи: {str(e)}")
-                await session.rollback()
+                logger.error("Ошибка при добавлении записи в %s: %s", cls.model.__tablename__, e)
+                await rollback(session)
                 raise
 
     @classmethod
-    async def update(cls, id: int, field: str, data):
-        async with async_session_maker() as session:
+    async def update(cls, id: int, field: str, data, load=None):
+        async with get_session() as session:
             query = (
                 update(cls.model)
                 .where(cls.model.id == id)
                 .values({field: data})
                 .returning(cls.model)
+                .options(*load_options(load))
             )
 
             if query is not None:
                 updated = await session.execute(query)
 
-                await session.commit()
+                await commit(session)
 
                 return updated.scalar()
             else:
@@ -67,18 +150,18 @@ class BaseDAO:
 
     @classmethod
     async def delete(cls, id: int):
-        async with async_session_maker() as session:
+        async with get_session() as session:
             query = delete(cls.model).where(cls.model.id == id)
             if query is not None:
                 await session.execute(query)
-                await session.commit()
+                await commit(session)
                 return True
             else:
                 return False
 
     @classmethod
     async def count(cls, **filter_by):
-        async with async_session_maker() as session:
+        async with get_session() as session:
             query = select(func.count()).select_from(cls.model).filter_by(**filter_by)
             result = await session.execute(query)
             return result.scalar()
@@ -1,21 +1,160 @@
-from sqlalchemy.ext.asyncio import async_sessionmaker, create_async_engine
+from collections.abc import AsyncIterator, Awaitable, Callable
+from contextlib import asynccontextmanager
+from contextvars import ContextVar
+import time
+
+from sqlalchemy.ext.asyncio import AsyncSession, async_sessionmaker, create_async_engine
 from sqlalchemy.orm import DeclarativeBase
 from sqlalchemy import NullPool
+from sqlalchemy.pool import AsyncAdaptedQueuePool
+from sqlalchemy.util.queue import AsyncAdaptedQueue
 from app.config import settings
 
+
+class MeteredQueue(AsyncAdaptedQueue):
+    """Очередь пула, которая считает ожидание свободного соединения"""
+
+    wait_count = 0
+    wait_seconds = 0.0
+    wait_max_seconds = 0.0
+
+    def get(self, block=True, timeout=None):
+        # без блокировки (есть overflow) или при свободном соединении ждать нечего,
+        # время на открытие нового соединения сюда не попадает
+        if not block or not self.empty():
+            return super().get(block, timeout)
+        start = time.perf_counter()
+        try:
+            return super().get(block, timeout)
+        finally:
+            waited = time.perf_counter() - start
+            self.wait_count += 1
+            self.wait_seconds += waited
+            self.wait_max_seconds = max(self.wait_max_seconds, waited)
+
+
+class MeteredPool(AsyncAdaptedQueuePool):
+    """Пул, который считает ожидание свободного соединения в очереди"""
+
+    _queue_class = MeteredQueue
+
+
 if settings.MODE == "TEST":
     DATABASE_URL = settings.TEST_DATABASE_URL
     DATABASE_PARAMS = {"poolclass":NullPool}
     
 else:
-    DATABASE_URL = settings.DATABASE_URL
-    DATABASE_PARAMS = {}
+    # BENCH работает с тем же пулом, что и прод, но на своей БД
+    DATABASE_URL = settings.BENCH_DATABASE_URL if settings.MODE == "BENCH" else settings.DATABASE_URL
+    DATABASE_PARAMS = {
+        "poolclass": MeteredPool,
+        "pool_size": settings.DB_POOL_SIZE,
+        "max_overflow": settings.DB_MAX_OVERFLOW,
+        "pool_recycle": settings.DB_POOL_RECYCLE,
+        "pool_timeout": settings.DB_POOL_TIMEOUT,
+    }
     
 async_engine = create_async_engine(
-    DATABASE_URL,**DATABASE_PARAMS, echo=True, pool_pre_ping=True
+    DATABASE_URL,
+    **DATABASE_PARAMS,
+    echo=settings.DB_ECHO if settings.DB_ECHO is not None else settings.MODE == "DEV",
+    pool_pre_ping=True,
+    connect_args={"prepared_statement_cache_size": settings.DB_STATEMENT_CACHE_SIZE},
 )
 async_session_maker = async_sessionmaker(
     bind=async_engine, expire_on_commit=False, autoflush=False, autocommit=False
 )
+# Сессия текущей единицы работы (обычно одного HTTP-запроса)
+current_session: ContextVar[AsyncSession | None] = ContextVar(
+    "current_session", default=None
+)
+
+
+@asynccontextmanager
+async def get_session() -> AsyncIterator[AsyncSession]:
+    """Сессия открытой единицы работы, а если ее нет - новая сессия"""
+    session = current_session.get()
+    if session is not None:
+        yield session
+        return
+    async with async_session_maker() as session:
+        yield session
+
+
+async def commit(session: AsyncSession):
+    """Внутри единицы работы только flush, коммит делает сама единица работы"""
+    if session is current_session.get():
+        await session.flush()
+    else:
+        await session.commit()
+
+
+async def rollback(session: AsyncSession):
+    """
+    Откат после ошибки DAO. Внутри единицы работы ничего не делаем: исключение
+    дойдет до unit_of_work, и она откатит весь запрос целиком.
+    """
+    if session is not current_session.get():
+        await session.rollback()
+
+
+async def commit_now():
+    """
+    Досрочный коммит единицы работы, например перед долгим внешним вызовом:
+    блокировки снимаются, соединение возвращается в пул. Следующий вызов DAO
+    начнет новую транзакцию, on_commit-колбэки ждут конца единицы работы.
+    """
+    session = current_session.get()
+    if session is not None:
+        await session.commit()
+
+
+@asynccontextmanager
+async def unit_of_work() -> AsyncIterator[AsyncSession]:
+    """Одна сессия и одно соединение на все вызовы DAO внутри блока"""
+    session = current_session.get()
+    if session is not None:
+        yield session
+        return
+    async with async_session_maker() as session:
+        token = current_session.set(session)
+        try:
+            yield session
+            await session.commit()
+        except Exception:
+            await session.rollback()
+            raise
+        finally:
+            current_session.reset(token)
+        for callback in session.info.pop("on_commit", []):
+            await callback()
+
+
+async def on_commit(callback: Callable[[], Awaitable]):
+    """Выполнить callback после коммита единицы работы, а вне ее - сразу"""
+    session = current_session.get()
+    if session is None:
+        await callback()
+    else:
+        session.info.setdefault("on_commit", []).append(callback)
+
+
 class Base(DeclarativeBase):
     pass
+
+
+def pool_status() -> dict:
+    """Состояние пула соединений: занятые, свободные, overflow и ожидание"""
+    pool = async_engine.pool
+    if not isinstance(pool, MeteredPool):
+        return {"pool": type(pool).__name__}
+    return {
+        "pool": type(pool).__name__,
+        "size": pool.size(),
+        "checked_out": pool.checkedout(),
+        "idle": pool.checkedin(),
+        "overflow": max(pool.overflow(), 0),
+        "wait_count": pool._pool.wait_count,
+        "wait_seconds_total": round(pool._pool.wait_seconds, 6),
+        "wait_seconds_max": round(pool._pool.wait_max_seconds, 6),
+    }
@@ -6,6 +6,7 @@ from app.users.dependencies import get_current_user
 from app.users.model import User
 from app.events.dao import EventDao
 from app.tags.dao import TagDao
+from app.cache import invalidate_event
 router = APIRouter(prefix="", tags=["События и тэги"])
 
 @router.post("/events/{event_id}/tags/{tag_id}", response_model=EventTagResponse)
@@ -20,7 +21,9 @@ async def create_event_tag(event_tag: EventTagCreate, current_user: User = Depen
         raise HTTPException(status_code=status.HTTP_404_NOT_FOUND, detail="Тэг не найден")
     if await EventTagDao.find_one_or_none(event_id=event_tag.event_id, tag_id=event_tag.tag_id):
         raise HTTPException(status_code=status.HTTP_409_CONFLICT, detail="Тэг уже существует")
-    return await EventTagDao.add(event_id = event_tag.event_id,tag_id = event_tag.tag_id)
+    new_event_tag = await EventTagDao.add(event_id = event_tag.event_id,tag_id = event_tag.tag_id)
+    await invalidate_event(event_tag.event_id)
+    return new_event_tag
     
 @router.get("/events/{event_id}/tags", response_model=EventTagList)
 async def get_event_tags(event_id: int, current_user: User = Depends(get_current_user)):
@@ -38,6 +41,7 @@ async def delete_event_tag(event_id: int, tag_id: int, current_user: User = Depe
     if not event:
         raise HTTPException(status_code=status.HTTP_404_NOT_FOUND, detail="событие или тэг не найден")
     await EventTagDao.delete(id=event.id)
+    await invalidate_event(event_id)
     return {"message":"тэг удален"}
     
 @router.get("/tags/{tag_id}/events", response_model=EventTag2List)
@@ -1,32 +1,54 @@
+import logging
+
 from app.dao.base import BaseDAO
 from app.events.model import Event
 from sqlalchemy.orm import joinedload
-from sqlalchemy import select, delete
-from app.database import async_session_maker
+from sqlalchemy import select, delete, func, true, update
+from app.database import commit, get_session, rollback
 from typing import List, Optional
 from app.event_tags.model import EventTag
+from app.registration.model import Registration
+from app.additional_registration.model import Registration_additional
 from datetime import datetime
 
+logger = logging.getLogger(__name__)
+
 
 class EventDao(BaseDAO):
     model = Event
 
     @classmethod
     async def find_all_with_tags(cls, **filter_by):
-        async with async_session_maker() as session:
+        """Все ивенты: сначала предстоящие, затем прошедшие, внутри - по времени начала"""
+        async with get_session() as session:
             query = (
                 select(cls.model)
                 .filter_by(**filter_by)
-                .order_by(cls.model.start_time.asc())  # Сортировка по времени начала
+                .order_by(cls.model.start_time < func.now(), cls.model.start_time, cls.model.id)
             )
             if hasattr(cls.model, 'tags'):
                 query = query.options(joinedload(cls.model.tags))
             result = await session.execute(query)
             return result.unique().scalars().all()
 
+    @classmethod
+    async def set_media_variants(cls, media_url: str, variants: dict[str, str]) -> list[int]:
+        """Записать адреса копий всем ивентам с этой обложкой, вернуть их id"""
+        async with get_session() as session:
+            query = (
+                update(cls.model)
+                .where(cls.model.media_url == media_url)
+                .values(media_variants=variants)
+                .returning(cls.model.id)
+            )
+            result = await session.execute(query)
+            event_ids = list(result.scalars().all())
+            await commit(session)
+            return event_ids
+
     @classmethod
     async def find_one_or_none(cls, **filter_by):
-        async with async_session_maker() as session:
+        async with get_session() as session:
             query = (
                 select(cls.model)
                 .options(joinedload(cls.model.tags))
@@ -38,23 +60,75 @@ class EventDao(BaseDAO):
     @classmethod
     async def delete_event(cls, event_id: int) -> bool:
         """Удалить событие и все его связи"""
-        async with async_session_maker() as session:
+        async with get_session() as session:
             try:
                 # Удаляем все связанные записи из event_tags
                 await session.execute(
                     delete(EventTag).where(EventTag.event_id == event_id)
                 )
-                await session.commit()
+                await commit(session)
 
                 # Удаляем сам event
                 await session.execute(
                     delete(cls.model).where(cls.model.id == event_id)
                 )
-                await session.commit()
+                await commit(session)
                 return True
-            except Exception as e:
-                await session.rollback()
-                raise e
+            except Exception:
+                await rollback(session)
+                raise
+
+    @classmethod
+    async def change_counters(cls, session, event_id: int, members: int = 0, additional: int = 0):
+        """Атомарно сдвинуть счетчики записей ивента в транзакции вызывающего"""
+        await session.execute(
+            update(cls.model)
+            .where(cls.model.id == event_id)
+            .values(
+                count_members=cls.model.count_members + members,
+                count_additional=cls.model.count_additional + additional,
+                # счетчик - не правка ивента, updated_at не трогаем
+                updated_at=cls.model.updated_at,
+            )
+            .execution_options(synchronize_session=False)
+        )
+
+    @classmethod
+    async def reconcile_counters(cls, *event_ids: int) -> list[int]:
+        """
+        Пересчитать счетчики по таблицам записей (только event_ids, если они
+        переданы), вернуть id исправленных ивентов
+        """
+        async with get_session() as session:
+            members = (
+                select(func.count(Registration.id))
+                .where(Registration.event_id == cls.model.id)
+                .scalar_subquery()
+            )
+            additional = (
+                select(func.count(Registration_additional.id))
+                .where(Registration_additional.event_id == cls.model.id)
+                .scalar_subquery()
+            )
+            query = (
+                update(cls.model)
+                .where(
+                    (cls.model.count_members.is_distinct_from(members))
+                    | (cls.model.count_additional.is_distinct_from(additional))
+                )
+                .where(cls.model.id.in_(event_ids) if event_ids else true())
+                .values(
+                    count_members=members,
+                    count_additional=additional,
+                    updated_at=cls.model.updated_at,
+                )
+                .returning(cls.model.id)
+                .execution_options(synchronize_session=False)
+            )
+            result = await session.execute(query)
+            fixed = list(result.scalars().all())
+            await commit(session)
+            return fixed
 
     async def get_event_with_tags(self, event_id: int) -> Optional[Event]:
         """Получить событие с тегами"""
@@ -69,24 +143,21 @@ class EventDao(BaseDAO):
         """
         Добавление записи в таблицу
         """
-        print("Попытка добавления записи в таблицу event")
-        print(f"Данные для вставки: {kwargs}")
+        logger.debug("Попытка добавления записи в таблицу event")
+        logger.debug("Данные для вставки: %s", kwargs)
         
         # Добавляем временные метки
         kwargs['created_at'] = datetime.now()
         kwargs['updated_at'] = datetime.now()
         
-        try:
-            async with async_session_maker() as session:
+        async with get_session() as session:
+            try:
                 event = cls.model(**kwargs)
                 session.add(event)
-                await session.commit()
+                await commit(session)
                 await session.refresh(event)
                 return event
-        except Exception as e:
-            print(f"Ошибка при добавлении записи: {str(e)}")
-            import traceback
-            print(f"Полный стек ошибки: {traceback.format_exc()}")
-            if 'session' in locals():
-                await session.rollback()
-            raise
\ No newline at end of file
+            except Exception as e:
+                logger.exception("Ошибка при добавлении записи: %s", e)
+                await rollback(session)
+                raise
\ No newline at end of file
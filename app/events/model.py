@@ -2,7 +2,8 @@
 from datetime import datetime, UTC
 from typing import List, Optional
 
-from sqlalchemy import DateTime, String, Text, func, select, Boolean, Integer, text
+from sqlalchemy import DateTime, Index, String, Text, func, select, Boolean, Integer, text
+from sqlalchemy.dialects.postgresql import JSONB
 from sqlalchemy.orm import Mapped, column_property, mapped_column, relationship
 
 
@@ -18,13 +19,24 @@ if TYPE_CHECKING:
 
 class Event(Base):
     __tablename__ = "event"
+    __table_args__ = (
+        # список ивентов постранично по (start_time, id)
+        Index("ix_event_start_time", "start_time", "id"),
+    )
 
     id: Mapped[int] = mapped_column(primary_key=True, index=True)
     title: Mapped[str] = mapped_column(String(255), nullable=False)
     description: Mapped[str] = mapped_column(Text)
     media_url: Mapped[Optional[str]] = mapped_column(String(255), nullable=True)
+    # адреса WebP-копий обложки {имя ширины: url}, заполняет задача make_image_variants
+    media_variants: Mapped[dict[str, str]] = mapped_column(
+        JSONB, nullable=False, default=dict, server_default=text("'{}'::jsonb")
+    )
     max_members: Mapped[int] = mapped_column(Integer, nullable=False)
-    count_members: Mapped[int] = mapped_column(Integer, default=0)
+    # Счетчики записей, их двигают RegistrationDao и RegistrationAddDao
+    count_members: Mapped[int] = mapped_column(Integer, default=0, server_default=text("0"))
+    count_additional: Mapped[int] = mapped_column(Integer, default=0, server_default=text("0"))
+    # Вместимость листа ожидания
     additional_members: Mapped[int] = mapped_column(Integer, default=0)
     location: Mapped[str] = mapped_column(String(255), nullable=True)
     start_time: Mapped[datetime] = mapped_column(
@@ -39,10 +51,10 @@ class Event(Base):
     )
     is_active: Mapped[bool] = mapped_column(Boolean, default=True)
     created_at: Mapped[datetime] = mapped_column(
-        DateTime(timezone=True), nullable=False, server_default=text('CURRENT_TIMESTAMP AT TIME ZONE \'UTC\'')
+        DateTime(timezone=True), nullable=False, server_default=text('(CURRENT_TIMESTAMP AT TIME ZONE \'UTC\')')
     )
     updated_at: Mapped[datetime] = mapped_column(
-        DateTime(timezone=True), nullable=False, server_default=text('CURRENT_TIMESTAMP AT TIME ZONE \'UTC\''), onupdate=text('CURRENT_TIMESTAMP AT TIME ZONE \'UTC\'')
+        DateTime(timezone=True), nullable=False, server_default=text('(CURRENT_TIMESTAMP AT TIME ZONE \'UTC\')'), onupdate=text('CURRENT_TIMESTAMP AT TIME ZONE \'UTC\'')
     )
 
     # Relationships
@@ -1,50 +1,78 @@
-from fastapi import APIRouter, Depends, HTTPException, status, UploadFile, File, Form
+from fastapi import APIRouter, Depends, HTTPException, Request, Response, status, UploadFile, File, Form
 from typing import List
 import os
 from datetime import datetime, timezone
 import logging
 from pytz import timezone
 
-from app.users.dao import UsersDao
+from fastapi_cache.decorator import cache
+
+from app.cache import invalidate_event
+from app.database import on_commit
 from app.events.dao import EventDao
+from app.events.model import Event
 from app.events.schemas import EventCreate, EventResponse, UploadedImagesResponse
+from app.events.uploads import UPLOAD_DIR, VARIANT_NAME_RE, save_upload, upload_url
+from app.pagination import NEXT_CURSOR_HEADER, PageParams, page_params
 from app.users.dependencies import get_current_user
 from app.users.model import User
-from app.registration.dao import RegistrationDao
-from app.tasks.tasks import send_about_new_event
+from app.tasks.celery_app import celery
+from app.tasks.images import make_image_variants
+from app.tasks.tasks import broadcast_new_event
+from celery.result import AsyncResult
 
 logger = logging.getLogger(__name__)
 
 router = APIRouter(prefix="/events", tags=["События"])
 
-UPLOAD_DIR = "uploads"
 if not os.path.exists(UPLOAD_DIR):
     os.makedirs(UPLOAD_DIR)
 
+def event_to_response(event) -> dict:
+    return {
+        "id": event.id,
+        "title": event.title,
+        "description": event.description,
+        "media_url": event.media_url,
+        "media_variants": event.media_variants,
+        "max_members": event.max_members,
+        "location": event.location,
+        "start_time": event.start_time,
+        "end_time": event.end_time,
+        "count_members": event.count_members,
+        "additional_members": event.additional_members,
+        "count_additional": event.count_additional,
+        "created_at": event.created_at,
+        "updated_at": event.updated_at,
+        "is_active": event.is_active,
+        "tags": [tag.name for tag in event.tags]
+    }
+
+@cache(namespace="events")
+async def events_page(limit: int | None, after: str | None) -> dict:
+    if limit is None:
+        # без пагинации - весь список, как раньше, предстоящие первыми
+        events = await EventDao.find_all_with_tags()
+        return {"items": [event_to_response(event) for event in events], "next_cursor": None}
+    page = await EventDao.find_page(limit, after, order_by=Event.start_time, load=[Event.tags])
+    return {"items": [event_to_response(event) for event in page.items], "next_cursor": page.next_cursor}
+
+
 @router.get("/", response_model=List[EventResponse])
-async def get_all_events_with_tags():
-    events = await EventDao.find_all_with_tags()
-    result = []
-    for event in events:
-        count_members = await RegistrationDao.count(event_id=event.id)
-        event_dict = {
-            "id": event.id,
-            "title": event.title,
-            "description": event.description,
-            "media_url": event.media_url,
-            "max_members": event.max_members,
-            "location": event.location,
-            "start_time": event.start_time,
-            "end_time": event.end_time,
-            "count_members": count_members,
-            "additional_members": event.additional_members,
-            "created_at": event.created_at,
-            "updated_at": event.updated_at,
-            "is_active": event.is_active,
-            "tags": [tag.name for tag in event.tags]
-        }
-        result.append(event_dict)
-    return result
+async def get_all_events_with_tags(
+    request: Request,
+    response: Response,
+    page: PageParams = Depends(page_params),
+):
+    # тело остается списком, курсор следующей страницы - в заголовке;
+    # кешируется страница целиком вместе с курсором
+    result = await events_page(request=request, response=response, limit=page.limit, after=page.after)
+    if isinstance(result, Response):
+        # 304 по If-None-Match
+        return result
+    if result["next_cursor"]:
+        response.headers[NEXT_CURSOR_HEADER] = result["next_cursor"]
+    return result["items"]
 
 @router.get("/uploads", response_model=UploadedImagesResponse)
 async def get_uploaded_images():
@@ -53,10 +81,14 @@ async def get_uploaded_images():
         return UploadedImagesResponse(images=[])
     
     files = os.listdir(UPLOAD_DIR)
-    image_files = [f"/uploads/{f}" for f in files if f.lower().endswith(('.png', '.jpg', '.jpeg', '.gif', '.webp'))]
+    image_files = [
+        f"/uploads/{f}" for f in files
+        if f.lower().endswith(('.png', '.jpg', '.jpeg', '.gif', '.webp')) and not VARIANT_NAME_RE.match(f)
+    ]
     return UploadedImagesResponse(images=image_files)
 
 @router.get("/{event_id}", response_model=EventResponse)
+@cache(namespace="events")
 async def get_event(event_id: int):
     event = await EventDao.find_one_or_none(id=event_id)
     if not event:
@@ -64,23 +96,7 @@ async def get_event(event_id: int):
             status_code=status.HTTP_404_NOT_FOUND,
             detail="Событие не найдено",
         )
-    count_members = await RegistrationDao.count(event_id=event_id)
-    return {
-        "id": event.id,
-        "title": event.title,
-        "description": event.description,
-        "media_url": event.media_url,
-        "max_members": event.max_members,
-        "location": event.location,
-        "start_time": event.start_time,
-        "end_time": event.end_time,
-        "count_members": count_members,
-        "additional_members": event.additional_members,
-        "created_at": event.created_at,
-        "updated_at": event.updated_at,
-        "is_active": event.is_active,
-        "tags": [tag.name for tag in event.tags]
-    }
+    return event_to_response(event)
 
 @router.post("/admin_create", response_model=EventResponse)
 async def create_event(
@@ -125,24 +141,20 @@ async def create_event(
     final_media_url = media_url
     if image and not media_url:
         try:
-            # Создаем уникальное имя файла
-            timestamp = datetime.now().strftime("%Y%m%d_%H%M%S")
-            filename = f"{timestamp}_{image.filename}"
-            filepath = os.path.join(UPLOAD_DIR, filename)
-            
-            # Сохраняем файл
-            with open(filepath, "wb") as buffer:
-                content = await image.read()
-                buffer.write(content)
-            
-            # Формируем URL для доступа к файлу
-            final_media_url = f"/uploads/{filename}"
-        except Exception as e:
+            filename = await save_upload(image)
+        except OSError as e:
             logger.error(f"Ошибка при загрузке изображения: {str(e)}")
             raise HTTPException(
                 status_code=500,
                 detail=f"Ошибка при загрузке изображения: {str(e)}"
             )
+        final_media_url = upload_url(filename)
+
+        async def make_variants():
+            make_image_variants.delay(filename)
+
+        # задача записывает копии в строку ивента, поэтому запускается после коммита
+        await on_commit(make_variants)
 
     try:
         event = await EventDao.add(
@@ -158,24 +170,8 @@ async def create_event(
         
         # Получаем событие с загруженными тегами
         event_with_tags = await EventDao.find_one_or_none(id=event.id)
-        count_members = await RegistrationDao.count(event_id=event.id)
-        
-        return {
-            "id": event_with_tags.id,
-            "title": event_with_tags.title,
-            "description": event_with_tags.description,
-            "media_url": event_with_tags.media_url,
-            "max_members": event_with_tags.max_members,
-            "location": event_with_tags.location,
-            "start_time": event_with_tags.start_time,
-            "end_time": event_with_tags.end_time,
-            "count_members": count_members,
-            "additional_members": event_with_tags.additional_members,
-            "created_at": event_with_tags.created_at,
-            "updated_at": event_with_tags.updated_at,
-            "is_active": event_with_tags.is_active,
-            "tags": [tag.name for tag in event_with_tags.tags]
-        }
+        await invalidate_event()
+        return event_to_response(event_with_tags)
     except Exception as e:
         logger.error(f"Ошибка при создании мероприятия: {str(e)}")
         raise HTTPException(
@@ -205,24 +201,9 @@ async def delete_event(
         )
     
     try:
-        count_members = await RegistrationDao.count(event_id=event_id)
         await EventDao.delete_event(event_id)
-        return {
-            "id": event.id,
-            "title": event.title,
-            "description": event.description,
-            "media_url": event.media_url,
-            "max_members": event.max_members,
-            "location": event.location,
-            "start_time": event.start_time,
-            "end_time": event.end_time,
-            "count_members": count_members,
-            "additional_members": event.additional_members,
-            "created_at": event.created_at,
-            "updated_at": event.updated_at,
-            "is_active": event.is_active,
-            "tags": [tag.name for tag in event.tags]
-        }
+        await invalidate_event(event_id)
+        return event_to_response(event)
     except Exception as e:
         raise HTTPException(
             status_code=500,
@@ -242,24 +223,30 @@ async def send_notification(event_id: int, current_user: User = Depends(get_curr
             status_code=status.HTTP_404_NOT_FOUND,
             detail="Событие не найдено",
         )
-    users = await UsersDao.find_all()
+    # Преобразуем дату в datetime, если она не является datetime
+    start_time = event.start_time
+    if isinstance(start_time, str):
+        start_time = datetime.fromisoformat(start_time.replace('Z', '+00:00'))
     try:
-        for user in users:
-            # Преобразуем дату в datetime, если она не является datetime
-            start_time = event.start_time
-            if isinstance(start_time, str):
-                start_time = datetime.fromisoformat(start_time.replace('Z', '+00:00'))
-            send_about_new_event.delay(
-                to=user.email,
-                username=user.username,
-                event_name=event.title,
-                time_start=start_time
-            )
-        return {"message": "Уведомления успешно отправлены"}
+        task = broadcast_new_event.delay(event_name=event.title, time_start=start_time)
     except Exception as e:
         logger.error(f"Ошибка при отправке уведомлений: {str(e)}")
         raise HTTPException(
             status_code=status.HTTP_500_INTERNAL_SERVER_ERROR,
             detail=f"Ошибка при отправке уведомлений: {str(e)}"
         )
+    return {"message": "Рассылка уведомлений запущена", "task_id": task.id}
+
+
+@router.get("/notification/status/{task_id}")
+async def get_notification_status(task_id: str, current_user: User = Depends(get_current_user)):
+    """Прогресс рассылки: state и счетчики sent/failed/total"""
+    if current_user.admin_status == "user":
+        raise HTTPException(
+            status_code=status.HTTP_403_FORBIDDEN,
+            detail="У вас нет прав для просмотра рассылок",
+        )
+    result = AsyncResult(task_id, app=celery)
+    info = result.info if isinstance(result.info, dict) else {}
+    return {"task_id": task_id, "state": result.state, **info}
         
@@ -38,7 +38,10 @@ class EventResponse(EventBase):
     updated_at: datetime
     is_active: bool
     additional_members: int
+    count_additional: int
     tags: List[str]
+    # уменьшенные WebP-копии обложки: {"small": url, "medium": url}
+    media_variants: dict[str, str] = {}
 
 
 class UploadedImage(BaseModel):
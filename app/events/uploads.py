@@ -0,0 +1,112 @@
+import hashlib
+import os
+import re
+import tempfile
+from typing import BinaryIO
+
+from fastapi import UploadFile
+from starlette.concurrency import run_in_threadpool
+
+from app.config import settings
+from app.exceptions import ImageTooLargeException, UnsupportedImageException
+
+UPLOAD_DIR = "uploads"
+CHUNK_SIZE = 1024 * 1024
+
+# Тип определяем по первым байтам файла, а не по имени и заголовку клиента
+SIGNATURES = (
+    (b"\xff\xd8\xff", "jpg"),
+    (b"\x89PNG\r\n\x1a\n", "png"),
+    (b"GIF87a", "gif"),
+    (b"GIF89a", "gif"),
+)
+# Загруженные через create_event файлы: <первые 32 hex-символа sha256>.<ext>
+UPLOAD_NAME_RE = re.compile(r"^([0-9a-f]{32})\.(jpg|png|gif|webp)$")
+VARIANT_NAME_RE = re.compile(r"^[0-9a-f]{32}_\d+\.webp$")
+
+
+def sniff_image(head: bytes) -> str | None:
+    """Расширение по сигнатуре файла, None - не картинка"""
+    if head[:4] == b"RIFF" and head[8:12] == b"WEBP":
+        return "webp"
+    for signature, extension in SIGNATURES:
+        if head.startswith(signature):
+            return extension
+    return None
+
+
+def store_image(source: BinaryIO) -> str:
+    """
+    Скопировать картинку в UPLOAD_DIR частями по CHUNK_SIZE, проверяя тип и размер.
+    Имя файла - хеш содержимого, поэтому повторная загрузка той же картинки
+    не создает копию. Вызывается в потоке, не в event loop.
+    """
+    head = source.read(CHUNK_SIZE)
+    extension = sniff_image(head)
+    if extension is None:
+        raise UnsupportedImageException
+
+    digest = hashlib.sha256()
+    size = 0
+    # пишем во временный файл рядом, чтобы /uploads не отдал недописанную картинку
+    fd, temp_path = tempfile.mkstemp(dir=UPLOAD_DIR, suffix=".part")
+    try:
+        with os.fdopen(fd, "wb") as target:
+            chunk = head
+            while chunk:
+                size += len(chunk)
+                if size > settings.UPLOAD_MAX_SIZE:
+                    raise ImageTooLargeException
+                digest.update(chunk)
+                target.write(chunk)
+                chunk = source.read(CHUNK_SIZE)
+        filename = f"{digest.hexdigest()[:32]}.{extension}"
+        path = os.path.join(UPLOAD_DIR, filename)
+        if os.path.exists(path):
+            os.remove(temp_path)
+        else:
+            os.replace(temp_path, path)
+    except BaseException:
+        if os.path.exists(temp_path):
+            os.remove(temp_path)
+        raise
+    return filename
+
+
+async def save_upload(image: UploadFile) -> str:
+    if image.size is not None and image.size > settings.UPLOAD_MAX_SIZE:
+        raise ImageTooLargeException
+    return await run_in_threadpool(store_image, image.file)
+
+
+def upload_url(filename: str) -> str:
+    return f"/uploads/{filename}"
+
+
+def upload_filename(media_url: str | None) -> str | None:
+    """Имя файла загрузки create_event по адресу обложки, None - внешняя ссылка или старая загрузка"""
+    if not media_url or not media_url.startswith("/uploads/"):
+        return None
+    filename = media_url.removeprefix("/uploads/")
+    return filename if UPLOAD_NAME_RE.match(filename) else None
+
+
+def variant_name(filename: str, width: int) -> str:
+    return f"{filename.rsplit('.', 1)[0]}_{width}.webp"
+
+
+def variant_urls(media_url: str | None) -> dict[str, str]:
+    """
+    Адреса уменьшенных WebP-копий обложки, которые уже лежат в UPLOAD_DIR.
+    Внешних ссылок и старых загрузок это не касается. Проверяет файлы на диске,
+    поэтому вызывается из задачи make_image_variants, а не в обработчике запроса.
+    """
+    filename = upload_filename(media_url)
+    if filename is None:
+        return {}
+    variants = {}
+    for name, width in settings.IMAGE_VARIANT_WIDTHS.items():
+        variant = variant_name(filename, width)
+        if os.path.exists(os.path.join(UPLOAD_DIR, variant)):
+            variants[name] = upload_url(variant)
+    return variants
@@ -36,3 +36,23 @@ UserIsNotActiveException = HTTPException(
 InvalidTokenException = HTTPException(
     status_code=status.HTTP_400_BAD_REQUEST, detail="Неправильный токен или он истек"
 )
+
+CourtSlotTakenException = HTTPException(
+    status_code=status.HTTP_409_CONFLICT, detail="Время уже занято"
+)
+
+PasswordHasherBusyException = HTTPException(
+    status_code=status.HTTP_503_SERVICE_UNAVAILABLE, detail="Сервис перегружен, попробуйте позже"
+)
+
+InvalidCursorException = HTTPException(
+    status_code=status.HTTP_400_BAD_REQUEST, detail="Неправильный курсор страницы"
+)
+
+ImageTooLargeException = HTTPException(
+    status_code=status.HTTP_413_REQUEST_ENTITY_TOO_LARGE, detail="Изображение слишком большое"
+)
+
+UnsupportedImageException = HTTPException(
+    status_code=status.HTTP_415_UNSUPPORTED_MEDIA_TYPE, detail="Поддерживаются только JPEG, PNG, GIF и WebP"
+)
@@ -0,0 +1,217 @@
+"""
+Проверка планов запросов DAO: каждый запрос горячих путей выполняется
+на заполненной тестовой БД, затем для него делается EXPLAIN. Полное чтение
+растущей таблицы значит, что запросу не хватает индекса.
+
+Планы строятся с enable_seqscan = off: так Postgres берет индекс всегда,
+когда он подходит, и результат не зависит от объема тестовых данных.
+Зато без подходящего индекса вместо Seq Scan в плане окажется Index Scan
+по первичному ключу с Filter и без Index Cond - это тоже полное чтение.
+Работает только в MODE=TEST: тестовая БД пересоздается и заполняется заново.
+
+    MODE=TEST python -m app.explain_check
+"""
+import argparse
+import asyncio
+import json
+import sys
+from collections.abc import Awaitable, Callable
+from datetime import date, datetime, timedelta
+
+from sqlalchemy import event, insert, text
+
+from app.additional_registration.dao import RegistrationAddDao
+from app.additional_registration.model import Registration_additional
+from app.benchmark import seed
+from app.config import settings
+from app.court_reservation.dao import CourtReservationDAO
+from app.court_reservation.model import CourtReservation
+from app.court_reservation.schemas import CourtReservation_response
+from app.coworking.model import Coworking
+from app.coworking_reservation.dao import CoworkingReservationDAO
+from app.coworking_reservation.model import CoworkingReservation
+from app.database import async_engine, async_session_maker, current_session
+from app.events.dao import EventDao
+from app.events.model import Event
+from app.registration.dao import RegistrationDao
+from app.registration.model import Registration
+from app.registration.schemas import RegistrationResponse
+from app.tags.dao import TagDao
+from app.tags.schemas import TagResponse
+from app.users.dao import UsersDao
+
+# Таблицы, которые растут вместе с историей; маленькие справочники читаются целиком
+GROWING_TABLES = {
+    "court_reservations",
+    "registration",
+    "registration_additional",
+    "coworking_reservation",
+    "event",
+    "event_tags",
+    "users",
+}
+EXPLAINED = ("SELECT", "UPDATE", "DELETE", "WITH")
+FILTERED_SCANS = ("Index Scan", "Index Only Scan")
+
+
+async def seed_more(users: int, events: int, coworkings: int):
+    """К данным бенчмарка добавляем записи на ивенты и коворкинг"""
+    async with async_session_maker() as session:
+        await session.execute(insert(Registration), [
+            {"user_id": i, "event_id": i % events + 1} for i in range(1, users + 1)
+        ])
+        await session.execute(insert(Registration_additional), [
+            {"user_id": i, "event_id": (i + 1) % events + 1} for i in range(1, users + 1)
+        ])
+        await session.execute(insert(Coworking), [
+            {"name": f"Место {i}", "description": "", "is_available": True} for i in range(1, coworkings + 1)
+        ])
+        start = datetime.now() - timedelta(days=30)
+        # у каждого места одна открытая бронь, остальные закрыты
+        await session.execute(insert(CoworkingReservation), [
+            {
+                "coworking_id": i % coworkings + 1,
+                "user_id": i % users + 1,
+                "start_time": start + timedelta(hours=i),
+                "end_time": None if i < coworkings else start + timedelta(hours=i + 1),
+            }
+            for i in range(users * 2)
+        ])
+        await session.commit()
+    async with async_engine.begin() as conn:
+        await conn.execute(text("ANALYZE"))
+
+
+async def next_page(dao, **kwargs):
+    """Вторая страница, чтобы в план попало и условие курсора"""
+    page = await dao.find_page(1, **kwargs)
+    await dao.find_page(settings.PAGE_SIZE, page.next_cursor, **kwargs)
+
+
+def checks() -> list[tuple[str, Callable[[], Awaitable]]]:
+    today = date.today()
+    limit = settings.PAGE_SIZE
+    return [
+        ("users: find_by_id", lambda: UsersDao.find_by_id(1)),
+        ("events: страница списка", lambda: next_page(EventDao, order_by=Event.start_time, load=[Event.tags])),
+        ("events: ивент с тэгами", lambda: EventDao.find_one_or_none(id=1)),
+        ("tags: страница списка", lambda: next_page(TagDao, schema=TagResponse)),
+        ("court_reservations: брони за день", lambda: CourtReservationDAO.find_all_admin(today - timedelta(days=1))),
+        ("court_reservations: занятые слоты", lambda: CourtReservationDAO.find_busy_slots(today, today + timedelta(days=7))),
+        ("court_reservations: мои брони", lambda: next_page(
+            CourtReservationDAO, order_by=CourtReservation.date, schema=CourtReservation_response,
+            user_id=1, is_confirmed=False,
+        )),
+        ("court_reservations: временные брони", lambda: CourtReservationDAO.find_all_columns(
+            CourtReservation_response, user_id=1, is_confirmed=False,
+        )),
+        ("court_reservations: подтверждение оплаты", lambda: CourtReservationDAO.confirm_payment(1, "bench-0")),
+        ("court_reservations: снятие неоплаченных", lambda: CourtReservationDAO.expire_holds(datetime.utcnow() - timedelta(days=1))),
+        ("registration: запись пользователя", lambda: RegistrationDao.find_one_or_none(user_id=1, event_id=2)),
+        ("registration: мои записи", lambda: RegistrationDao.find_page(limit, schema=RegistrationResponse, user_id=1)),
+        ("registration_additional: первый в листе ожидания", lambda: RegistrationAddDao.find_first_added(event_id=1)),
+        ("coworking_reservation: открытая бронь пользователя", lambda: CoworkingReservationDAO.find_one_or_none(user_id=2, end_time=None)),
+        ("coworking_reservation: открытая бронь места", lambda: CoworkingReservationDAO.find_one_or_none(coworking_id=1, end_time=None)),
+        ("coworking_reservation: история пользователя", lambda: next_page(
+            CoworkingReservationDAO, user_id=1, load=[CoworkingReservation.coworking],
+        )),
+    ]
+
+
+def full_scans(plan: dict) -> list[str]:
+    """
+    Растущие таблицы, которые план читает целиком: Seq Scan или обход
+    всего индекса с Filter, но без Index Cond
+    """
+    found = []
+    if plan.get("Relation Name") in GROWING_TABLES:
+        node = plan["Node Type"]
+        if node == "Seq Scan":
+            found.append(f"Seq Scan {plan['Relation Name']}")
+        elif node in FILTERED_SCANS and "Filter" in plan and "Index Cond" not in plan:
+            found.append(f"{node} {plan['Relation Name']} ({plan['Index Name']}) без Index Cond")
+    for child in plan.get("Plans", []):
+        found += full_scans(child)
+    return found
+
+
+def scans(plan: dict) -> list[str]:
+    """Узлы чтения таблиц для отчета: "Index Scan court_reservations (ix_...)" """
+    found = []
+    if "Relation Name" in plan:
+        index = f" ({plan['Index Name']})" if "Index Name" in plan else ""
+        found.append(f"{plan['Node Type']} {plan['Relation Name']}{index}")
+    for child in plan.get("Plans", []):
+        found += scans(child)
+    return found
+
+
+async def explain_all() -> list[dict]:
+    statements: list[tuple[str, tuple]] = []
+
+    def capture(conn, cursor, statement, parameters, context, executemany):
+        if not executemany and statement.lstrip().upper().startswith(EXPLAINED):
+            statements.append((statement, parameters))
+
+    report = []
+    # все вызовы DAO в одной транзакции, которая в конце откатывается
+    async with async_session_maker() as session:
+        token = current_session.set(session)
+        try:
+            conn = await session.connection()
+            await conn.exec_driver_sql("SET LOCAL enable_seqscan = off")
+            for name, call in checks():
+                statements.clear()
+                event.listen(async_engine.sync_engine, "before_cursor_execute", capture)
+                try:
+                    await call()
+                finally:
+                    event.remove(async_engine.sync_engine, "before_cursor_execute", capture)
+
+                for statement, parameters in list(statements):
+                    result = await conn.exec_driver_sql(f"EXPLAIN (FORMAT JSON) {statement}", parameters)
+                    plan = result.scalar()
+                    if isinstance(plan, str):
+                        plan = json.loads(plan)
+                    plan = plan[0]["Plan"]
+                    report.append({
+                        "query": name,
+                        "sql": " ".join(statement.split()),
+                        "scans": scans(plan),
+                        "full_scans": full_scans(plan),
+                    })
+        finally:
+            current_session.reset(token)
+            await session.rollback()
+    return report
+
+
+async def main(args):
+    assert settings.MODE == "TEST", "Проверка пересоздает БД, запускайте ее с MODE=TEST"
+    await seed(args.users, args.events, args.courts, pending=args.users)
+    await seed_more(args.users, args.events, args.coworkings)
+    report = await explain_all()
+    await async_engine.dispose()
+
+    failed = [item for item in report if item["full_scans"]]
+    for item in report:
+        status = "FULL SCAN " + ", ".join(item["full_scans"]) if item["full_scans"] else "ok"
+        print(f"[{status}] {item['query']}: {'; '.join(item['scans'])}")
+        if args.verbose or item["full_scans"]:
+            print(f"    {item['sql']}")
+    print(f"Запросов: {len(report)}, без индекса: {len(failed)}")
+    return 1 if failed else 0
+
+
+def parse_args():
+    parser = argparse.ArgumentParser(description="EXPLAIN запросов DAO на тестовых данных")
+    parser.add_argument("--users", type=int, default=500)
+    parser.add_argument("--events", type=int, default=50)
+    parser.add_argument("--courts", type=int, default=4)
+    parser.add_argument("--coworkings", type=int, default=20)
+    parser.add_argument("--verbose", action="store_true", help="печатать SQL всех запросов")
+    return parser.parse_args()
+
+
+if __name__ == "__main__":
+    sys.exit(asyncio.run(main(parse_args())))
@@ -1,8 +1,9 @@
 from collections.abc import AsyncIterator
+import time
 from contextlib import asynccontextmanager
 import os
 
-from fastapi import FastAPI
+from fastapi import Depends, FastAPI, Request
 from fastapi.middleware.cors import CORSMiddleware
 from fastapi.staticfiles import StaticFiles
 from sqladmin import Admin
@@ -17,9 +18,14 @@ from app.admin.view import (
     RegistrationAdmin,
     UserAdmin,
 )
+from app.cache import init_cache
 from app.database import async_engine as engine
+from app.logger import new_request_id, request_id, setup_logging, stop_logging
 from app.events.router import router as event_router
+from app.pagination import NEXT_CURSOR_HEADER
+from app.payments.service import payment_gateway
 from app.registration.router import router as registration_router
+from app.users.dependencies import get_async_session
 from app.users.router import router as users_router
 from app.event_tags.router import router as event_tags_router
 from app.tags.router import router as tags_router
@@ -27,16 +33,22 @@ from app.coworking.router import router as coworking_router
 from app.coworking_reservation.router import router as coworking_reservation_router
 from app.courts.router import router as courts_router
 from app.court_reservation.router import router as court_reservation_router
+from app.monitoring.metrics import QueryStats, metrics, query_stats, server_timing
+from app.monitoring.router import metrics_router, router as monitoring_router
 
 @asynccontextmanager
 async def lifespan(app: FastAPI):
     # Создаем директорию для загрузки файлов при запуске приложения
     if not os.path.exists("uploads"):
         os.makedirs("uploads")
+    setup_logging()
+    init_cache()
     yield
+    await payment_gateway.close()
+    stop_logging()
 
 
-app = FastAPI(lifespan=lifespan)
+app = FastAPI(lifespan=lifespan, dependencies=[Depends(get_async_session)])
 
 # Настройка CORS
 app.add_middleware(
@@ -45,8 +57,38 @@ app.add_middleware(
     allow_credentials=True,
     allow_methods=["*"],  # Разрешаем все методы
     allow_headers=["*"],  # Разрешаем все заголовки
+    expose_headers=[NEXT_CURSOR_HEADER],  # курсор страницы должен быть виден фронтенду
 )
 
+
+@app.middleware("http")
+async def request_id_middleware(request: Request, call_next):
+    # id запроса берем у прокси, если он его передал, и возвращаем клиенту
+    token = request_id.set(request.headers.get("X-Request-ID") or new_request_id())
+    try:
+        response = await call_next(request)
+        response.headers["X-Request-ID"] = request_id.get()
+        return response
+    finally:
+        request_id.reset(token)
+
+
+@app.middleware("http")
+async def timing_middleware(request: Request, call_next):
+    # время ответа и SQL-запросы по маршрутам для /metrics и заголовка Server-Timing
+    stats = QueryStats()
+    token = query_stats.set(stats)
+    start = time.perf_counter()
+    try:
+        response = await call_next(request)
+    finally:
+        query_stats.reset(token)
+    elapsed = time.perf_counter() - start
+    route = request.scope.get("route")
+    metrics.observe_request(request.method, route.path if route else "unmatched", response.status_code, elapsed, stats)
+    response.headers["Server-Timing"] = server_timing(stats, elapsed)
+    return response
+
 # Монтируем статическую директорию для загруженных файлов
 app.mount("/uploads", StaticFiles(directory="uploads"), name="uploads")
 
@@ -82,4 +124,6 @@ app.include_router(tags_router)
 app.include_router(coworking_router)
 app.include_router(coworking_reservation_router)
 app.include_router(courts_router)
-app.include_router(court_reservation_router)
\ No newline at end of file
+app.include_router(court_reservation_router)
+app.include_router(monitoring_router)
+app.include_router(metrics_router)
\ No newline at end of file
@@ -0,0 +1,165 @@
+import logging
+import time
+from collections import defaultdict
+from contextvars import ContextVar
+from dataclasses import dataclass
+
+import redis
+from redis import asyncio as aioredis
+from sqlalchemy import event
+
+from app.cache import REDIS_URL
+from app.database import async_engine, pool_status
+
+logger = logging.getLogger(__name__)
+
+# Границы бакетов гистограммы времени ответа, в секундах
+LATENCY_BUCKETS = (0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1, 2.5, 5, 10)
+
+
+@dataclass
+class QueryStats:
+    count: int = 0
+    seconds: float = 0.0
+
+
+# Запросы к БД в рамках текущего HTTP-запроса
+query_stats: ContextVar[QueryStats | None] = ContextVar("query_stats", default=None)
+
+
+class Histogram:
+    def __init__(self, buckets: tuple[float, ...]):
+        self.buckets = buckets
+        self.counts = [0] * len(buckets)
+        self.count = 0
+        self.sum = 0.0
+
+    def observe(self, value: float):
+        self.count += 1
+        self.sum += value
+        for i, bound in enumerate(self.buckets):
+            if value <= bound:
+                self.counts[i] += 1
+
+
+class Metrics:
+    """Метрики процесса, отдаются в формате Prometheus на /metrics"""
+
+    def __init__(self):
+        # (method, route, status) -> гистограмма времени ответа
+        self.latency: dict[tuple[str, str, int], Histogram] = defaultdict(lambda: Histogram(LATENCY_BUCKETS))
+        # (method, route) -> QueryStats всех запросов маршрута
+        self.route_queries: dict[tuple[str, str], QueryStats] = defaultdict(QueryStats)
+        self.db = QueryStats()
+
+    def observe_request(self, method: str, route: str, status: int, seconds: float, stats: QueryStats):
+        self.latency[(method, route, status)].observe(seconds)
+        route_stats = self.route_queries[(method, route)]
+        route_stats.count += stats.count
+        route_stats.seconds += stats.seconds
+
+    def render(self) -> str:
+        lines = [
+            "# HELP http_request_duration_seconds Время обработки HTTP-запроса",
+            "# TYPE http_request_duration_seconds histogram",
+        ]
+        for (method, route, status), histogram in sorted(self.latency.items()):
+            labels = f'method="{method}",route="{route}",status="{status}"'
+            for bound, count in zip(histogram.buckets, histogram.counts):
+                lines.append(f'http_request_duration_seconds_bucket{{{labels},le="{bound}"}} {count}')
+            lines.append(f'http_request_duration_seconds_bucket{{{labels},le="+Inf"}} {histogram.count}')
+            lines.append(f"http_request_duration_seconds_sum{{{labels}}} {histogram.sum}")
+            lines.append(f"http_request_duration_seconds_count{{{labels}}} {histogram.count}")
+
+        lines += [
+            "# HELP http_request_db_queries_total SQL-запросы, выполненные при обработке маршрута",
+            "# TYPE http_request_db_queries_total counter",
+        ]
+        for (method, route), stats in sorted(self.route_queries.items()):
+            lines.append(f'http_request_db_queries_total{{method="{method}",route="{route}"}} {stats.count}')
+        lines += [
+            "# HELP http_request_db_seconds_total Время SQL-запросов при обработке маршрута",
+            "# TYPE http_request_db_seconds_total counter",
+        ]
+        for (method, route), stats in sorted(self.route_queries.items()):
+            lines.append(f'http_request_db_seconds_total{{method="{method}",route="{route}"}} {stats.seconds}')
+
+        lines += [
+            "# TYPE db_queries_total counter",
+            f"db_queries_total {self.db.count}",
+            "# TYPE db_query_seconds_total counter",
+            f"db_query_seconds_total {self.db.seconds}",
+        ]
+        for key, value in pool_status().items():
+            if isinstance(value, (int, float)):
+                lines += [f"# TYPE db_pool_{key} gauge", f"db_pool_{key} {value}"]
+        return "\n".join(lines) + "\n"
+
+
+metrics = Metrics()
+
+
+class SharedCounter:
+    """
+    Счетчик, который увеличивает воркер Celery. Он работает в отдельном процессе,
+    и память API ему недоступна, поэтому значение хранится в Redis: воркер делает
+    INCRBY, /metrics читает ключ. Ошибки Redis не ломают ни задачу, ни /metrics.
+    """
+
+    def __init__(self, name: str, description: str):
+        self.name = name
+        self.description = description
+        self.key = f"metrics:{name}"
+
+    def inc(self, amount: int = 1):
+        """Вызывается из синхронной задачи Celery"""
+        try:
+            with redis.Redis.from_url(REDIS_URL) as client:
+                client.incrby(self.key, amount)
+        except redis.RedisError as e:
+            logger.warning(f"Не удалось обновить метрику {self.name}: {str(e)}")
+
+    async def render(self) -> list[str]:
+        try:
+            async with aioredis.from_url(REDIS_URL) as client:
+                value = int(await client.get(self.key) or 0)
+        except redis.RedisError as e:
+            logger.warning(f"Не удалось прочитать метрику {self.name}: {str(e)}")
+            return []
+        return [
+            f"# HELP {self.name} {self.description}",
+            f"# TYPE {self.name} counter",
+            f"{self.name} {value}",
+        ]
+
+
+court_holds_expired = SharedCounter("court_holds_expired_total", "Неоплаченные брони кортов, снятые по COURT_HOLD_TTL")
+SHARED_COUNTERS = (court_holds_expired,)
+
+
+async def render_all() -> str:
+    """Метрики процесса API и общие счетчики из Redis"""
+    lines = []
+    for counter in SHARED_COUNTERS:
+        lines += await counter.render()
+    return metrics.render() + "".join(line + "\n" for line in lines)
+
+
+@event.listens_for(async_engine.sync_engine, "before_cursor_execute")
+def before_cursor_execute(conn, cursor, statement, parameters, context, executemany):
+    conn.info["query_start"] = time.perf_counter()
+
+
+@event.listens_for(async_engine.sync_engine, "after_cursor_execute")
+def after_cursor_execute(conn, cursor, statement, parameters, context, executemany):
+    elapsed = time.perf_counter() - conn.info.pop("query_start", time.perf_counter())
+    metrics.db.count += 1
+    metrics.db.seconds += elapsed
+    stats = query_stats.get()
+    if stats is not None:
+        stats.count += 1
+        stats.seconds += elapsed
+
+
+def server_timing(stats: QueryStats, seconds: float) -> str:
+    return f'db;dur={stats.seconds * 1000:.1f};desc="{stats.count} queries", total;dur={seconds * 1000:.1f}'
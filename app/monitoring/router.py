@@ -0,0 +1,23 @@
+from fastapi import APIRouter, Depends, HTTPException, status
+from fastapi.responses import PlainTextResponse
+
+from app.database import pool_status
+from app.monitoring.metrics import render_all
+from app.users.dependencies import get_current_user
+from app.users.model import User
+
+router = APIRouter(prefix="/monitoring", tags=["Мониторинг"])
+# /metrics без префикса - адрес, который по умолчанию опрашивает Prometheus
+metrics_router = APIRouter(tags=["Мониторинг"])
+
+
+@router.get("/db-pool")
+async def get_db_pool(current_user: User = Depends(get_current_user)):
+    if current_user.admin_status != "admin":
+        raise HTTPException(status_code=status.HTTP_403_FORBIDDEN, detail="Недостаточно прав")
+    return pool_status()
+
+
+@metrics_router.get("/metrics", response_class=PlainTextResponse, include_in_schema=False)
+async def get_metrics():
+    return await render_all()
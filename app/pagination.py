@@ -0,0 +1,63 @@
+import base64
+import binascii
+import json
+from dataclasses import dataclass
+from datetime import date, datetime
+
+from fastapi import Query
+
+from app.config import settings
+from app.exceptions import InvalidCursorException
+
+# Курсор следующей страницы для ответов-списков, у которых нет поля next_cursor
+NEXT_CURSOR_HEADER = "X-Next-Cursor"
+
+
+@dataclass
+class Page:
+    items: list
+    # None - это последняя страница
+    next_cursor: str | None = None
+
+
+@dataclass
+class PageParams:
+    # None - весь список одним ответом
+    limit: int | None = None
+    after: str | None = None
+
+
+def page_params(
+    limit: int | None = Query(None, ge=1, le=settings.PAGE_SIZE_MAX, description="без limit и after - весь список"),
+    after: str | None = Query(None, description="next_cursor предыдущей страницы"),
+) -> PageParams:
+    """Без limit и after список отдается целиком, как до пагинации; after без limit - страница PAGE_SIZE"""
+    if limit is None and after is not None:
+        limit = settings.PAGE_SIZE
+    return PageParams(limit=limit, after=after)
+
+
+def encode_cursor(values: list) -> str:
+    """Значения ключа сортировки последней записи страницы -> непрозрачная строка"""
+    raw = json.dumps([value.isoformat() if isinstance(value, date) else value for value in values])
+    return base64.urlsafe_b64encode(raw.encode()).decode().rstrip("=")
+
+
+def decode_cursor(cursor: str, columns: list) -> list:
+    """Обратно в значения с типами колонок ключа, иначе asyncpg не примет параметры"""
+    try:
+        values = json.loads(base64.urlsafe_b64decode(cursor + "=" * (-len(cursor) % 4)))
+        if not isinstance(values, list) or len(values) != len(columns):
+            raise ValueError(cursor)
+        return [parse_value(column, value) for column, value in zip(columns, values)]
+    except (ValueError, TypeError, binascii.Error):
+        raise InvalidCursorException
+
+
+def parse_value(column, value):
+    python_type = column.type.python_type
+    if python_type is datetime:
+        return datetime.fromisoformat(value)
+    if python_type is date:
+        return date.fromisoformat(value)
+    return python_type(value)
@@ -1,23 +1,32 @@
+import asyncio
+from abc import ABC, abstractmethod
+import hashlib
+import hmac
+import logging
 import uuid
 
-from yookassa import Configuration, Payment
+import httpx
+
 from app.config import settings
-import hmac
-import hashlib
+
+logger = logging.getLogger(__name__)
 
 YOUR_SECRET_KEY = settings.SECRET_KEY
+YOOKASSA_API_URL = "https://api.yookassa.ru/v3"
+
 
 def generate_secure_rental_id(rental_id, secret_key):
     return hmac.new(secret_key.encode(), rental_id.encode(), hashlib.sha256).hexdigest()
 
-Configuration.account_id = settings.shop_idd
-Configuration.secret_key = settings.shop_secret
 
+def verify_rental_signature(rental_id: int, signature: str, secret_key: str) -> bool:
+    expected = hmac.new(secret_key.encode(), str(rental_id).encode(), hashlib.sha256).hexdigest()
+    return hmac.compare_digest(expected, signature)
 
-def create_payment(amount: float, rental_id: int, url: str, description: str, email: str):
-    rental_signature = generate_secure_rental_id(str(rental_id), YOUR_SECRET_KEY)
 
-    payment = Payment.create({
+def build_payment(amount: float, rental_id: int, url: str, description: str, email: str) -> dict:
+    rental_signature = generate_secure_rental_id(str(rental_id), YOUR_SECRET_KEY)
+    return {
         "amount": {
             "value": f"{amount:.2f}",
             "currency": "RUB"
@@ -25,27 +34,22 @@ def create_payment(amount: float, rental_id: int, url: str, description: str, em
         "receipt": {
             "customer": {
                 "email": email
+            },
+            "items": [
+                {
+                    "description": description,
+                    "quantity": 1,
+                    "amount": {
+                        "value": f"{amount:.2f}",
+                        "currency": "RUB"
+                    },
+                    "vat_code": 1,
+                    "measure": "hour",
+                    "payment_mode": "full_payment",
+                    "payment_subject": "service",
+                }
+            ]
         },
-        "items": [
-            {
-                "description": description,
-                "quantity": 1,
-                "amount": {
-                    "value": f"{amount:.2f}",
-                    "currency": "RUB"
-                },
-                "vat_code": 1,
-                "measure": "hour",
-                "payment_mode": "full_payment",
-                "payment_subject": "service",
-                
-               
-            }
-        ]
-        },
-    #     "payment_method_data": {
-    #   "type": "bank_card"
-    #     },
         "confirmation": {
             "type": "redirect",
             "return_url": url
@@ -56,11 +60,114 @@ def create_payment(amount: float, rental_id: int, url: str, description: str, em
             "rental_id": rental_id,
             "rental_signature": rental_signature
         }
-    }, rental_id)
-    return payment.confirmation.confirmation_url, payment.id
+    }
 
 
-def verify_rental_signature(rental_id: int, signature: str, secret_key: str) -> bool:
-    expected = hmac.new(secret_key.encode(), str(rental_id).encode(), hashlib.sha256).hexdigest()
-    return hmac.compare_digest(expected, signature)
+class PaymentGatewayError(Exception):
+    pass
+
+
+class PaymentGateway(ABC):
+    """Платежный шлюз: все вызовы асинхронные и не блокируют event loop"""
+
+    @abstractmethod
+    async def create_payment(self, amount: float, rental_id: int, url: str, description: str, email: str) -> tuple[str, str]:
+        """Создать платеж, вернуть (ссылка на оплату, id платежа)"""
+
+    @abstractmethod
+    async def find_payment(self, payment_id: str) -> dict:
+        """Получить платеж в формате API ЮKassa"""
+
+    async def close(self):
+        pass
+
+
+class YooKassaGateway(PaymentGateway):
+    """
+    ЮKassa через общий httpx.AsyncClient: пул соединений, таймауты
+    и повтор при сетевых ошибках и 5xx. Повторы безопасны, т.к. создание
+    платежа идет с ключом идемпотентности.
+    """
+
+    def __init__(self):
+        self.client = httpx.AsyncClient(
+            base_url=YOOKASSA_API_URL,
+            auth=(settings.shop_idd, settings.shop_secret),
+            timeout=settings.PAYMENT_TIMEOUT,
+            limits=httpx.Limits(max_connections=settings.PAYMENT_MAX_CONNECTIONS),
+        )
+
+    async def request(self, method: str, url: str, **kwargs) -> dict:
+        for attempt in range(settings.PAYMENT_RETRIES + 1):
+            try:
+                response = await self.client.request(method, url, **kwargs)
+                if response.status_code < 500:
+                    break
+                error = f"ЮKassa ответила {response.status_code}"
+            except httpx.TransportError as e:
+                error = str(e)
+            logger.warning(f"Ошибка запроса {method} {url} (попытка {attempt + 1}): {error}")
+            if attempt < settings.PAYMENT_RETRIES:
+                await asyncio.sleep(0.5 * 2 ** attempt)
+        else:
+            raise PaymentGatewayError(error)
+        if response.is_error:
+            raise PaymentGatewayError(f"ЮKassa ответила {response.status_code}: {response.text}")
+        return response.json()
+
+    async def create_payment(self, amount: float, rental_id: int, url: str, description: str, email: str) -> tuple[str, str]:
+        payment = await self.request(
+            "POST",
+            "/payments",
+            json=build_payment(amount, rental_id, url, description, email),
+            headers={"Idempotence-Key": str(rental_id)},
+        )
+        return payment["confirmation"]["confirmation_url"], payment["id"]
+
+    async def find_payment(self, payment_id: str) -> dict:
+        return await self.request("GET", f"/payments/{payment_id}")
+
+    async def close(self):
+        await self.client.aclose()
+
+
+class FakePaymentGateway(PaymentGateway):
+    """Шлюз без сети для тестов и нагрузочных прогонов, платежи хранятся в памяти"""
+
+    def __init__(self):
+        self.payments: dict[str, dict] = {}
+
+    async def create_payment(self, amount: float, rental_id: int, url: str, description: str, email: str) -> tuple[str, str]:
+        if settings.PAYMENT_FAKE_DELAY:
+            await asyncio.sleep(settings.PAYMENT_FAKE_DELAY)
+        payment_id = str(uuid.uuid4())
+        payment = build_payment(amount, rental_id, url, description, email)
+        payment.update({
+            "id": payment_id,
+            "status": "pending",
+            "confirmation": {
+                "type": "redirect",
+                "confirmation_url": f"{url}?fake_payment={payment_id}",
+            },
+        })
+        self.payments[payment_id] = payment
+        return payment["confirmation"]["confirmation_url"], payment_id
+
+    async def find_payment(self, payment_id: str) -> dict:
+        if payment_id not in self.payments:
+            raise PaymentGatewayError(f"Платеж {payment_id} не найден")
+        return self.payments[payment_id]
+
+    def succeed(self, payment_id: str) -> dict:
+        """Отметить платеж оплаченным, как это сделал бы пользователь"""
+        self.payments[payment_id]["status"] = "succeeded"
+        return self.payments[payment_id]
+
+
+def create_gateway() -> PaymentGateway:
+    if settings.MODE in ("TEST", "BENCH") or settings.PAYMENT_GATEWAY == "fake":
+        return FakePaymentGateway()
+    return YooKassaGateway()
+
 
+payment_gateway = create_gateway()
@@ -0,0 +1,12 @@
+from .events.dao import EventDao
+
+
+async def main():
+    fixed = await EventDao.reconcile_counters()
+    print(f"Исправлены счетчики ивентов: {fixed}" if fixed else "Счетчики ивентов в порядке")
+
+
+if __name__ == "__main__":
+    import asyncio
+
+    asyncio.run(main())
@@ -1,6 +1,138 @@
+from datetime import UTC, datetime
+from enum import StrEnum
+from typing import NamedTuple
+
+from sqlalchemy import delete, exists, insert, select
+
+from app.additional_registration.model import Registration_additional
 from app.dao.base import BaseDAO
+from app.database import commit, get_session
+from app.events.dao import EventDao
+from app.events.model import Event
 from app.registration.model import Registration
 
 
+class RegistrationStatus(StrEnum):
+    created = "created"
+    deleted = "deleted"
+    not_found = "not_found"
+    duplicate = "duplicate"
+    in_other_list = "in_other_list"
+    full = "full"
+    started = "started"
+
+
+class RegistrationResult(NamedTuple):
+    status: RegistrationStatus
+    registration: Registration | Registration_additional | None = None
+    event: Event | None = None
+
+
+async def lock_event(session, event_id: int) -> Event | None:
+    """Заблокировать строку ивента до конца транзакции"""
+    query = (
+        select(Event)
+        .where(Event.id == event_id)
+        .with_for_update()
+        .execution_options(populate_existing=True)
+    )
+    return (await session.execute(query)).scalars().one_or_none()
+
+
+def is_started(event: Event) -> bool:
+    return event.start_time.replace(tzinfo=UTC) < datetime.now(UTC)
+
+
 class RegistrationDao(BaseDAO):
     model = Registration
+
+    @classmethod
+    async def register(cls, event_id: int, user_id: int) -> RegistrationResult:
+        """
+        Записать пользователя на ивент в одной транзакции.
+        Строка ивента блокируется, поэтому параллельные записи
+        проверяют число мест по очереди и не переполняют ивент.
+        """
+        async with get_session() as session:
+            event = await lock_event(session, event_id)
+            if not event:
+                return RegistrationResult(RegistrationStatus.not_found)
+
+            checks_query = select(
+                exists().where(
+                    cls.model.event_id == event_id, cls.model.user_id == user_id
+                ),
+                exists().where(
+                    Registration_additional.event_id == event_id,
+                    Registration_additional.user_id == user_id,
+                ),
+            )
+            is_registered, in_additional = (await session.execute(checks_query)).one()
+            if is_registered:
+                return RegistrationResult(RegistrationStatus.duplicate, event=event)
+            if event.count_members >= event.max_members:
+                return RegistrationResult(RegistrationStatus.full, event=event)
+            if is_started(event):
+                return RegistrationResult(RegistrationStatus.started, event=event)
+            if in_additional:
+                return RegistrationResult(RegistrationStatus.in_other_list, event=event)
+
+            query = (
+                insert(cls.model)
+                .values(event_id=event_id, user_id=user_id)
+                .returning(cls.model)
+            )
+            registration = (await session.execute(query)).scalar()
+            await EventDao.change_counters(session, event_id, members=1)
+            await commit(session)
+            return RegistrationResult(RegistrationStatus.created, registration, event)
+
+    @classmethod
+    async def unregister(cls, event_id: int, user_id: int) -> RegistrationResult:
+        """
+        Отменить запись на ивент. Освободившееся место в той же транзакции
+        получает первый из листа ожидания, его запись возвращается в результате.
+        """
+        async with get_session() as session:
+            event = await lock_event(session, event_id)
+            if not event:
+                return RegistrationResult(RegistrationStatus.not_found)
+            registration_query = select(cls.model.id).where(
+                cls.model.event_id == event_id, cls.model.user_id == user_id
+            )
+            registration_id = (await session.execute(registration_query)).scalar()
+            if registration_id is None:
+                return RegistrationResult(RegistrationStatus.not_found)
+            if is_started(event):
+                return RegistrationResult(RegistrationStatus.started, event=event)
+            await session.execute(
+                delete(cls.model).where(cls.model.id == registration_id)
+            )
+
+            first_additional_query = (
+                delete(Registration_additional)
+                .where(
+                    Registration_additional.id
+                    == select(Registration_additional.id)
+                    .where(Registration_additional.event_id == event_id)
+                    .order_by(Registration_additional.id.asc())
+                    .limit(1)
+                    .scalar_subquery()
+                )
+                .returning(Registration_additional.user_id)
+            )
+            promoted_user_id = (await session.execute(first_additional_query)).scalar()
+            promoted = None
+            if promoted_user_id is not None:
+                promoted = (
+                    await session.execute(
+                        insert(cls.model)
+                        .values(event_id=event_id, user_id=promoted_user_id)
+                        .returning(cls.model)
+                    )
+                ).scalar()
+                await EventDao.change_counters(session, event_id, additional=-1)
+            else:
+                await EventDao.change_counters(session, event_id, members=-1)
+            await commit(session)
+            return RegistrationResult(RegistrationStatus.deleted, promoted, event)
@@ -1,7 +1,7 @@
 # model.py (Registration)
 from typing import TYPE_CHECKING
 
-from sqlalchemy import ForeignKey
+from sqlalchemy import ForeignKey, Index
 from sqlalchemy.orm import Mapped, mapped_column, relationship
 
 from app.database import Base
@@ -13,6 +13,10 @@ if TYPE_CHECKING:
 
 class Registration(Base):
     __tablename__ = "registration"
+    __table_args__ = (
+        # проверка повторной записи и список записей пользователя
+        Index("ix_registration_user_event", "user_id", "event_id"),
+    )
 
     id: Mapped[int] = mapped_column(primary_key=True)
     user_id: Mapped[int] = mapped_column(ForeignKey("users.id"))
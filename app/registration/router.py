@@ -1,10 +1,9 @@
-from datetime import UTC, datetime
+from fastapi import APIRouter, Depends, HTTPException, Response, status
 
-from fastapi import APIRouter, Depends, HTTPException, status
-
-from app.additional_registration.dao import RegistrationAddDao
-from app.events.dao import EventDao
-from app.registration.dao import RegistrationDao
+from app.cache import invalidate_event
+from app.database import on_commit
+from app.pagination import NEXT_CURSOR_HEADER, PageParams, page_params
+from app.registration.dao import RegistrationDao, RegistrationStatus
 from app.registration.schemas import RegistrationResponse
 from app.tasks.tasks import send_about_registration, send_about_new_event
 from app.users.dao import UsersDao
@@ -18,90 +17,86 @@ router = APIRouter(prefix="/users/registration", tags=["Соты регистр
 async def registration_on_event(
     event_id: int, current_user: User = Depends(get_current_user)
 ):
-    new_registration = await RegistrationDao.find_one_or_none(
-        user_id=current_user.id, event_id=event_id
-    )
-    if new_registration:
+    result = await RegistrationDao.register(event_id=event_id, user_id=current_user.id)
+    if result.status == RegistrationStatus.not_found:
         raise HTTPException(
-            status_code=status.HTTP_409_CONFLICT, detail="вы уже записаны на этот ивент"
+            status_code=status.HTTP_404_NOT_FOUND, detail="ивент не найден"
         )
-    is_exist = await EventDao.find_one_or_none(id=event_id)
-    if not is_exist:
+    if result.status == RegistrationStatus.duplicate:
         raise HTTPException(
-            status_code=status.HTTP_404_NOT_FOUND, detail="ивент не найден"
+            status_code=status.HTTP_409_CONFLICT, detail="вы уже записаны на этот ивент"
         )
-    count_users = await RegistrationDao.count(event_id=event_id)
-    if is_exist.max_members < count_users:
+    if result.status == RegistrationStatus.full:
         raise HTTPException(
             status_code=status.HTTP_409_CONFLICT, detail="места закончились"
         )
-    current_time = datetime.now(UTC)
-    if is_exist.start_time.replace(tzinfo=UTC) < current_time:
+    if result.status == RegistrationStatus.started:
         raise HTTPException(
             status_code=status.HTTP_409_CONFLICT, detail="ивент уже начался или прошел"
         )
-    in_addreg = await RegistrationAddDao.find_one_or_none(
-        event_id=event_id, user_id=current_user.id
-    )
-    if in_addreg:
+    if result.status == RegistrationStatus.in_other_list:
         raise HTTPException(
             status_code=status.HTTP_409_CONFLICT,
             detail="у вас уже есть запись на доп места",
         )
-    user_reg = await RegistrationDao.add(event_id=event_id, user_id=current_user.id)
-    send_about_registration.delay(
-        to=current_user.email,
-        username=current_user.username,
-        event_name=is_exist.title,
-        time_start=is_exist.start_time,
-    )
-    return user_reg
+    await invalidate_event(event_id)
+
+    async def notify():
+        send_about_registration.delay(
+            to=current_user.email,
+            username=current_user.username,
+            event_name=result.event.title,
+            time_start=result.event.start_time,
+        )
+
+    # письмо уходит только если запись зафиксирована
+    await on_commit(notify)
+    return result.registration
 
 
 @router.post("/disregistration/{event_id}")
 async def disregistration_on_event(
     event_id: int, current_user: User = Depends(get_current_user)
 ):
-    is_registration = await RegistrationDao.find_one_or_none(
-        event_id=event_id, user_id=current_user.id
-    )
-    if not is_registration:
+    result = await RegistrationDao.unregister(event_id=event_id, user_id=current_user.id)
+    if result.status == RegistrationStatus.not_found:
         raise HTTPException(
             status_code=status.HTTP_404_NOT_FOUND,
             detail="вы не зарегистрированы на этот ивент или его не существует",
         )
-    event = await EventDao.find_one_or_none(id=event_id)
-    current_time = datetime.now(UTC)
-    if event.start_time.replace(tzinfo=UTC) < current_time:
+    if result.status == RegistrationStatus.started:
         raise HTTPException(
             status_code=status.HTTP_409_CONFLICT, detail="ивент уже начался или прошел"
         )
-    await RegistrationDao.delete(is_registration.id)
-    first_from_list_additional = await RegistrationAddDao.find_first_added(
-        event_id=event_id
-    )
-    if first_from_list_additional:
-        await RegistrationAddDao.delete(first_from_list_additional.id)
-        await RegistrationDao.add(
-            event_id=first_from_list_additional.event_id,
-            user_id=first_from_list_additional.user_id,
-        )
-        new_user = await UsersDao.find_one_or_none(
-            id=first_from_list_additional.user_id
-        )
-        send_about_registration.delay(
-            to=new_user.email,
-            username=new_user.username,
-            event_name=event.title,
-            time_start=event.start_time,
-        )
+    await invalidate_event(event_id)
+    if result.registration:
+        new_user = await UsersDao.find_one_or_none(id=result.registration.user_id)
+
+        async def notify():
+            send_about_registration.delay(
+                to=new_user.email,
+                username=new_user.username,
+                event_name=result.event.title,
+                time_start=result.event.start_time,
+            )
+
+        # письмо первому из листа ожидания - после фиксации переноса
+        await on_commit(notify)
     return "запись удалена"
 
 
 @router.get("/my_registration/info", response_model=list[RegistrationResponse])
-async def my_registration_list(current_user: User = Depends(get_current_user)):
-    events = await RegistrationDao.find_all(user_id=current_user.id)
-    return events
+async def my_registration_list(
+    response: Response,
+    page: PageParams = Depends(page_params),
+    current_user: User = Depends(get_current_user),
+):
+    events = await RegistrationDao.find_page(
+        page.limit, page.after, schema=RegistrationResponse, user_id=current_user.id
+    )
+    if events.next_cursor:
+        response.headers[NEXT_CURSOR_HEADER] = events.next_cursor
+    return events.items
 
 
 @router.get("/my_registration/{event_id}", response_model=RegistrationResponse)
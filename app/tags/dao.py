@@ -1,6 +1,6 @@
 from app.dao.base import BaseDAO
 from app.tags.model import Tag
-from app.database import async_session_maker
+from app.database import commit, get_session, rollback
 from sqlalchemy import select, delete
 from app.event_tags.model import EventTag
 
@@ -8,7 +8,7 @@ class TagDao(BaseDAO):
     model = Tag
     @classmethod
     async def update_tag(cls, tag_id: int, name: str, description: str | None):
-        async with async_session_maker() as session:
+        async with get_session() as session:
             query = select(cls.model).where(cls.model.id == tag_id)
             result = await session.execute(query)
             tag = result.scalars().first()
@@ -17,7 +17,7 @@ class TagDao(BaseDAO):
             tag.name = name
             tag.description = description
 
-            await session.commit()
+            await commit(session)
             await session.refresh(tag)  
 
             return tag
@@ -25,21 +25,21 @@ class TagDao(BaseDAO):
     @classmethod
     async def delete_tag(cls, tag_id: int) -> bool:
         """Удалить тег и все его связи"""
-        async with async_session_maker() as session:
+        async with get_session() as session:
             try:
                 # Удаляем все связанные записи из event_tags
                 await session.execute(
                     delete(EventTag).where(EventTag.tag_id == tag_id)
                 )
-                await session.commit()
+                await commit(session)
 
                 # Удаляем сам тег
                 await session.execute(
                     delete(cls.model).where(cls.model.id == tag_id)
                 )
-                await session.commit()
+                await commit(session)
                 return True
-            except Exception as e:
-                await session.rollback()
-                raise e
+            except Exception:
+                await rollback(session)
+                raise
             
\ No newline at end of file
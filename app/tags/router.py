@@ -1,22 +1,25 @@
 from fastapi import APIRouter, Depends, HTTPException, status, Form
+from fastapi_cache.decorator import cache
+
+from app.cache import invalidate
 from app.tags.model import Tag
 from app.tags.dao import TagDao
+from app.pagination import PageParams, page_params
 from app.tags.schemas import TagsResponse, TagResponse, TagCreate, TagUpdate
 from app.users.dependencies import get_current_user
 from app.users.model import User
 router = APIRouter(prefix="/tags", tags=["Тэги"])
 
 @router.get("/all", response_model=TagsResponse)
-async def get_all_tags():
-    """Получаем все тэги"""
-    res = await TagDao.find_all()
-    if res == []:
-        return {"tags":[]}#TagsResponse(tags=[])
-    return {"tags":res}#TagsResponse(tags=res)
+@cache(namespace="tags")
+async def get_all_tags(page: PageParams = Depends(page_params)):
+    """Получаем все тэги, с limit/after - постранично"""
+    res = await TagDao.find_page(page.limit, page.after, schema=TagResponse)
+    return TagsResponse(tags=[TagResponse.model_validate(tag) for tag in res.items], next_cursor=res.next_cursor)
 
 @router.get("/{tag_id}", response_model=TagResponse)
 async def get_tag_info(tag_id: int):
-    tag = await TagDao.find_one_or_none(id=tag_id)
+    tag = await TagDao.find_one_columns(TagResponse, id=tag_id)
     if not tag:
         raise HTTPException(status_code=status.HTTP_404_NOT_FOUND,
                             detail="Тэг не найден")
@@ -39,6 +42,7 @@ async def create_tag(
 
     try:
         new_tag = await TagDao.add(name=name)
+        await invalidate("tags")
         return new_tag
     except Exception as e:
         raise HTTPException(
@@ -58,6 +62,9 @@ async def update_tag(
     if not tag:
         raise HTTPException(status_code=status.HTTP_404_NOT_FOUND, detail="Тэг не найден")
     tag = await TagDao.update_tag(tag_id, name, description)
+    await invalidate("tags")
+    # имена тэгов отдаются и в списке ивентов
+    await invalidate("events")
     return tag
 
 @router.delete("/delete/{tag_id}")
@@ -74,6 +81,8 @@ async def delete_tag(tag_id: int, current_user: User = Depends(get_current_user)
 
     try:
         await TagDao.delete_tag(tag_id)
+        await invalidate("tags")
+        await invalidate("events")
         return {"message": "Тег успешно удален"}
     except Exception as e:
         raise HTTPException(
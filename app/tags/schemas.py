@@ -24,3 +24,4 @@ class TagResponse(TagBase):
 
 class TagsResponse(BaseModel):
     tags: List[TagResponse]
+    next_cursor: str | None = None
@@ -1,11 +1,13 @@
 from celery import Celery
+from celery.signals import setup_logging as celery_setup_logging
 
 from app.config import settings
+from app.logger import setup_logging
 
 celery = Celery(
     "tasks",
     broker=settings.BROKER,
-    include=["app.tasks.tasks"],
+    include=["app.tasks.tasks", "app.tasks.images"],
     backend=settings.BACKEND,
 )
 celery.conf.update(
@@ -13,16 +15,32 @@ celery.conf.update(
     smtp_port=settings.SMTP_PORT,
     smtp_username=settings.SMTP_USERNAME,
     smtp_password=settings.SMTP_PASSWORD,
+    smtp_ssl=settings.SMTP_SSL,
+    smtp_timeout=settings.SMTP_TIMEOUT,
+    mail_rate_limit=settings.MAIL_RATE_LIMIT,
+    mail_batch_size=settings.MAIL_BATCH_SIZE,
     email_from=settings.EMAIL_FROM,
     task_serializer='json',
     accept_content=['json'],
     result_serializer='json',
     timezone='Europe/Moscow',
     enable_utc=True,
-    worker_max_tasks_per_child=1,
     worker_prefetch_multiplier=1,
     task_ignore_result=True,
     task_store_errors_even_if_ignored=True,
     telegram_token=settings.TELEGRAM_TOKEN,
-    telegram_chat_id=settings.TELEGRAM_CHAT_ID
+    telegram_chat_id=settings.TELEGRAM_CHAT_ID,
+    court_hold_ttl=settings.COURT_HOLD_TTL,
+    beat_schedule={
+        "expire-court-holds": {
+            "task": "expire_court_holds",
+            "schedule": settings.COURT_HOLD_SWEEP_INTERVAL,
+        },
+    },
 )
+
+
+@celery_setup_logging.connect
+def configure_logging(**kwargs):
+    # воркер пишет логи так же, как API, вместо собственной настройки celery
+    setup_logging()
@@ -0,0 +1,54 @@
+import logging
+import os
+
+from PIL import Image, ImageOps
+
+from app.cache import invalidate
+from app.config import settings
+from app.events.dao import EventDao
+from app.events.uploads import UPLOAD_DIR, upload_url, variant_name, variant_urls
+from app.tasks.celery_app import celery
+from app.tasks.runtime import run_async
+
+logger = logging.getLogger(__name__)
+
+
+def resize_to_width(image: Image.Image, width: int) -> Image.Image:
+    """Уменьшить до ширины width с сохранением пропорций; маленькие картинки не растягиваем"""
+    if image.width <= width:
+        return image.copy()
+    height = max(1, round(image.height * width / image.width))
+    return image.resize((width, height), Image.Resampling.LANCZOS)
+
+
+async def attach_variants(filename: str) -> list[int]:
+    """Записать готовые копии в ивенты с этой обложкой и сбросить их кеш"""
+    media_url = upload_url(filename)
+    event_ids = await EventDao.set_media_variants(media_url, variant_urls(media_url))
+    if event_ids:
+        await invalidate("events", "/events/", *(f"/events/{event_id}" for event_id in event_ids))
+    return event_ids
+
+
+@celery.task(name="make_image_variants")
+def make_image_variants(filename: str):
+    """WebP-копии загруженной обложки под ширины IMAGE_VARIANT_WIDTHS"""
+    source = os.path.join(UPLOAD_DIR, filename)
+    created = []
+    with Image.open(source) as image:
+        # у анимированных GIF берется первый кадр
+        image = ImageOps.exif_transpose(image)
+        image = image.convert("RGBA" if "A" in image.getbands() or "transparency" in image.info else "RGB")
+        for width in settings.IMAGE_VARIANT_WIDTHS.values():
+            target = os.path.join(UPLOAD_DIR, variant_name(filename, width))
+            if os.path.exists(target):
+                # та же картинка уже загружалась, имена копий зависят только от содержимого
+                continue
+            temp = f"{target}.part"
+            resize_to_width(image, width).save(temp, "WEBP", quality=settings.IMAGE_WEBP_QUALITY)
+            os.replace(temp, target)
+            created.append(os.path.basename(target))
+    # копии могли остаться от прошлой загрузки той же картинки - ивенту они нужны все равно
+    event_ids = run_async(attach_variants(filename))
+    logger.info("Копии обложки %s: %s", filename, created, extra={"image_variants": len(created)})
+    return {"variants": created, "events": event_ids}
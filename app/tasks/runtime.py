@@ -0,0 +1,48 @@
+import asyncio
+from collections.abc import Coroutine
+
+from celery.signals import worker_init, worker_process_init, worker_process_shutdown, worker_shutdown
+
+from app.cache import init_cache
+from app.database import async_engine
+
+# Один event loop на процесс воркера: соединения asyncpg в пуле движка
+# привязаны к loop, поэтому он живет столько же, сколько процесс
+loop: asyncio.AbstractEventLoop | None = None
+
+
+def get_loop() -> asyncio.AbstractEventLoop:
+    global loop
+    if loop is None or loop.is_closed():
+        loop = asyncio.new_event_loop()
+        asyncio.set_event_loop(loop)
+    return loop
+
+
+def run_async(coro: Coroutine):
+    """Выполнить корутину из задачи на общем loop процесса"""
+    return get_loop().run_until_complete(coro)
+
+
+@worker_init.connect
+def init_worker(**kwargs):
+    # задачи сбрасывают кеш ответов API (make_image_variants), соединения Redis
+    # открываются лениво, поэтому процессы после fork получают готовый кеш
+    init_cache()
+
+
+@worker_process_init.connect
+def init_worker_process(**kwargs):
+    # пул, унаследованный через fork от родителя, не трогаем и не закрываем
+    run_async(async_engine.dispose(close=False))
+
+
+@worker_process_shutdown.connect
+@worker_shutdown.connect
+def shutdown_worker_process(**kwargs):
+    global loop
+    if loop is None or loop.is_closed():
+        return
+    loop.run_until_complete(async_engine.dispose())
+    loop.close()
+    loop = None
@@ -0,0 +1,96 @@
+import logging
+import os
+import smtplib
+import threading
+from email.mime.multipart import MIMEMultipart
+from email.mime.text import MIMEText
+
+from celery.signals import worker_process_shutdown, worker_shutdown
+
+from app.tasks.celery_app import celery
+
+logger = logging.getLogger(__name__)
+
+# Ошибки, после которых соединение считаем мертвым и открываем заново
+CONNECTION_ERRORS = (smtplib.SMTPServerDisconnected, smtplib.SMTPConnectError, ConnectionError, TimeoutError)
+
+
+class SMTPConnection:
+    """
+    Одно авторизованное SMTP-соединение на процесс воркера. Открывается при
+    первом письме и переиспользуется следующими задачами, после обрыва
+    переподключается. Соединение, унаследованное через fork, не используется.
+    """
+
+    def __init__(self):
+        self.server: smtplib.SMTP | None = None
+        self.pid: int | None = None
+        self.lock = threading.Lock()
+
+    def connect(self) -> smtplib.SMTP:
+        conf = celery.conf
+        smtp_class = smtplib.SMTP_SSL if conf.smtp_ssl else smtplib.SMTP
+        server = smtp_class(conf.smtp_server, int(conf.smtp_port), timeout=conf.smtp_timeout)
+        if conf.smtp_username:
+            server.login(conf.smtp_username, conf.smtp_password)
+        self.server, self.pid = server, os.getpid()
+        return server
+
+    def get(self) -> smtplib.SMTP:
+        if self.server is None or self.pid != os.getpid():
+            self.server = None
+            return self.connect()
+        return self.server
+
+    def send(self, msg):
+        with self.lock:
+            try:
+                try:
+                    self.get().send_message(msg)
+                except smtplib.SMTPResponseException as e:
+                    # 421 - сервер закрывает канал, письмо не принято
+                    if e.smtp_code != 421:
+                        raise
+                    raise smtplib.SMTPServerDisconnected(e.smtp_error)
+            except CONNECTION_ERRORS as e:
+                # сервер закрыл простаивающее соединение - одна повторная попытка
+                logger.info(f"SMTP-соединение потеряно ({e}), переподключаемся")
+                self.drop()
+                self.connect().send_message(msg)
+
+    def drop(self):
+        """Закрыть соединение без ожидания ответа сервера"""
+        if self.server is not None:
+            try:
+                self.server.close()
+            finally:
+                self.server = None
+
+    def close(self):
+        with self.lock:
+            if self.server is None or self.pid != os.getpid():
+                self.server = None
+                return
+            try:
+                self.server.quit()
+            except (smtplib.SMTPException, OSError):
+                pass
+            self.drop()
+
+
+smtp_connection = SMTPConnection()
+
+
+def send_html_email(to: str, subject: str, body: str):
+    msg = MIMEMultipart()
+    msg["From"] = celery.conf.email_from
+    msg["To"] = to
+    msg["Subject"] = subject
+    msg.attach(MIMEText(body, "html"))
+    smtp_connection.send(msg)
+
+
+@worker_process_shutdown.connect
+@worker_shutdown.connect
+def close_smtp_connection(**kwargs):
+    smtp_connection.close()
@@ -1,14 +1,17 @@
 import asyncio
 import logging
-import smtplib
-from datetime import datetime
-from email.mime.multipart import MIMEMultipart
-from email.mime.text import MIMEText
+import time
+from datetime import datetime, timedelta
 from datetime import date
 from app.court_reservation.dao import CourtReservationDAO
+from app.monitoring.metrics import court_holds_expired
 from app.tasks.celery_app import celery
+from app.tasks.runtime import run_async
 from app.tasks.service import SpecialConvert
+from app.tasks.smtp import send_html_email
 from app.users.auth import generate_confirmation_token
+from app.users.dao import UsersDao
+from app.users.schemas import UserResponse
 from celery import shared_task
 from asgiref.sync import async_to_sync
 import requests
@@ -20,17 +23,7 @@ link_front = "https://skkrondo.ru"
 @celery.task(name="send_welcome_email")
 def send_welcome_email(to: str, username: str):
     try:
-        smtp_server = celery.conf.smtp_server
-        smtp_port = celery.conf.smtp_port
-        smtp_username = celery.conf.smtp_username
-        smtp_password = celery.conf.smtp_password
-        email_from = celery.conf.email_from
-
-        msg = MIMEMultipart()
-
-        msg["From"] = email_from
-        msg["To"] = to
-        msg["Subject"] = "Добро пожаловать!"
+        subject = "Добро пожаловать!"
 
         body = f"""
         <h1 style='font-size: 24px; color: #4F46E5;'>Привет, {username}!</h1>
@@ -40,11 +33,7 @@ def send_welcome_email(to: str, username: str):
         <hr style='border: none; border-top: 1px solid #ddd; margin: 20px 0;'>
         <p style='font-size: 14px; color: #666;'>Если у вас есть вопросы, напишите нам на почту <a href='mailto:sport@skkrondo.ru' style='color: #4F46E5;'>sport@skkrondo.ru</a>.</p>
         """
-        msg.attach(MIMEText(body, "html"))
-
-        with smtplib.SMTP_SSL(smtp_server, smtp_port) as server:
-            server.login(smtp_username, smtp_password)
-            server.send_message(msg)
+        send_html_email(to, subject, body)
 
         return {"status": "success"}
 
@@ -56,16 +45,7 @@ def send_welcome_email(to: str, username: str):
 @celery.task(name="send_login_email")
 def send_login_email(to: str, username: str):
     try:
-        smtp_server = celery.conf.smtp_server
-        smtp_port = celery.conf.smtp_port
-        smtp_username = celery.conf.smtp_username
-        smtp_password = celery.conf.smtp_password
-        email_from = celery.conf.email_from
-
-        msg = MIMEMultipart()
-        msg["From"] = email_from
-        msg["To"] = to
-        msg["Subject"] = "Вход в ваш аккаунт!"
+        subject = "Вход в ваш аккаунт!"
 
         body = f"""
         <h1>Привет, {username}!</h1>  
@@ -73,10 +53,7 @@ def send_login_email(to: str, username: str):
         <p>С уважением,  
         <br>Команда Рондо</p>
         """
-        msg.attach(MIMEText(body, "html"))
-        with smtplib.SMTP_SSL(smtp_server, smtp_port) as server:
-            server.login(smtp_username, smtp_password)
-            server.send_message(msg)
+        send_html_email(to, subject, body)
         return {"status": "success"}
     except Exception as e:
         logger.error(f"Ошибка {str(e)}")
@@ -88,16 +65,7 @@ def send_about_registration(
     to: str, username: str, event_name: str, time_start: datetime
 ):
     try:
-        smtp_server = celery.conf.smtp_server
-        smtp_port = celery.conf.smtp_port
-        smtp_username = celery.conf.smtp_username
-        smtp_password = celery.conf.smtp_password
-        email_from = celery.conf.email_from
-
-        msg = MIMEMultipart()
-        msg["From"] = email_from
-        msg["To"] = to
-        msg["Subject"] = "Регистрация на ивент"
+        subject = "Регистрация на ивент"
 
         body = f"""
         <h1 style='font-size: 24px; color: #4F46E5;'>Привет, {username}!</h1>
@@ -107,10 +75,7 @@ def send_about_registration(
         <hr style='border: none; border-top: 1px solid #ddd; margin: 20px 0;'>
         <p style='font-size: 14px; color: #666;'>Если у вас есть вопросы, напишите нам на почту <a href='mailto:sport@skkrondo.ru' style='color: #4F46E5;'>sport@skkrondo.ru</a>.</p>
         """
-        msg.attach(MIMEText(body, "html"))
-        with smtplib.SMTP_SSL(smtp_server, smtp_port) as server:
-            server.login(smtp_username, smtp_password)
-            server.send_message(msg)
+        send_html_email(to, subject, body)
         return {"status": "success"}
     except Exception as e:
         logger.error(f"Ошибка {str(e)}")
@@ -121,16 +86,7 @@ def send_about_registration_on_court(
     to: str, name: str, last_name:str, court: str, time_start: str
 ):
     try:
-        smtp_server = celery.conf.smtp_server
-        smtp_port = celery.conf.smtp_port
-        smtp_username = celery.conf.smtp_username
-        smtp_password = celery.conf.smtp_password
-        email_from = celery.conf.email_from
-
-        msg = MIMEMultipart()
-        msg["From"] = email_from
-        msg["To"] = to
-        msg["Subject"] = "Аренда корта"
+        subject = "Аренда корта"
 
         body = f"""
         <h1 style='font-size: 24px; color: #4F46E5;'>Здравствуйте, {name} {last_name}!</h1>
@@ -144,33 +100,18 @@ def send_about_registration_on_court(
         <hr style='border: none; border-top: 1px solid #ddd; margin: 20px 0;'>
         <p style='font-size: 14px; color: #666;'>Пожалуйста, не отвечайте на это письмо, оно отправлено автоматически. Если у вас есть вопросы, напишите нам на почту <a href='mailto:sport@skkrondo.ru' style='color: #4F46E5;'>sport@skkrondo.ru</a>.</p>
         """
-        msg.attach(MIMEText(body, "html"))
-        with smtplib.SMTP_SSL(smtp_server, smtp_port) as server:
-            server.login(smtp_username, smtp_password)
-            server.send_message(msg)
+        send_html_email(to, subject, body)
         return {"status": "success"}
     except Exception as e:
         logger.error(f"Ошибка {str(e)}")
         return {"status": "error", "message": str(e)}
 
 
-@celery.task(name="send_about_new_event")
-def send_about_new_event(
-    to: str, username: str, event_name: str, time_start: datetime
-):
-    try:
-        smtp_server = celery.conf.smtp_server
-        smtp_port = celery.conf.smtp_port
-        smtp_username = celery.conf.smtp_username
-        smtp_password = celery.conf.smtp_password
-        email_from = celery.conf.email_from
+NEW_EVENT_SUBJECT = "Появилось новое мероприятие"
 
-        msg = MIMEMultipart()
-        msg["From"] = email_from
-        msg["To"] = to
-        msg["Subject"] = "Появилось новое мероприятие"
 
-        body = f"""
+def new_event_body(username: str, event_name: str, time_start: datetime) -> str:
+    return f"""
         <h1 style='font-size: 24px; color: #4F46E5;'>Привет, {username}!</h1>
         <p style='font-size: 16px; color: #333;'>Появилось новое мероприятие: <strong>{event_name}</strong>.</p>
         <p style='font-size: 16px; color: #333;'>Начало: <strong>{SpecialConvert.format_datetime_moscow(time_start)}</strong>.</p>
@@ -178,30 +119,62 @@ def send_about_new_event(
         <hr style='border: none; border-top: 1px solid #ddd; margin: 20px 0;'>
         <p style='font-size: 14px; color: #666;'>Если у вас есть вопросы, напишите нам на почту <a href='mailto:sport@skkrondo.ru' style='color: #4F46E5;'>sport@skkrondo.ru</a>.</p>
         """
-        msg.attach(MIMEText(body, "html"))
-        with smtplib.SMTP_SSL(smtp_server, smtp_port) as server:
-            server.login(smtp_username, smtp_password)
-            server.send_message(msg)
+
+
+@celery.task(name="send_about_new_event")
+def send_about_new_event(
+    to: str, username: str, event_name: str, time_start: datetime
+):
+    try:
+        send_html_email(to, NEW_EVENT_SUBJECT, new_event_body(username, event_name, time_start))
         return {"status": "success"}
     except Exception as e:
         logger.error(f"Ошибка {str(e)}")
         return {"status": "error", "message": str(e)}
-    
+
+
+@celery.task(name="broadcast_new_event", bind=True, ignore_result=False)
+def broadcast_new_event(self, event_name: str, time_start: datetime):
+    """
+    Рассылка о новом мероприятии всем пользователям одной задачей.
+    Прогресс (sent/failed/total) пишется в состояние PROGRESS, итог - в результат.
+    """
+    return run_async(broadcast(self, event_name, time_start))
+
+
+async def broadcast(task, event_name: str, time_start: datetime) -> dict:
+    progress = {"sent": 0, "failed": 0, "total": await UsersDao.count()}
+    interval = 1 / celery.conf.mail_rate_limit
+    next_send = time.monotonic()
+    after = None
+    while True:
+        # получатели страницами по id, каждая страница - отдельный короткий запрос:
+        # пока идут письма, соединение с БД и транзакция не держатся
+        page = await UsersDao.find_page(celery.conf.mail_batch_size, after, schema=UserResponse)
+        for recipient in page.items:
+            email, username = recipient["email"], recipient["username"]
+            # не чаще mail_rate_limit писем в секунду
+            delay = next_send - time.monotonic()
+            if delay > 0:
+                await asyncio.sleep(delay)
+            next_send = max(next_send, time.monotonic()) + interval
+            try:
+                send_html_email(email, NEW_EVENT_SUBJECT, new_event_body(username, event_name, time_start))
+                progress["sent"] += 1
+            except Exception as e:
+                logger.error(f"Ошибка отправки {email}: {str(e)}")
+                progress["failed"] += 1
+        task.update_state(state="PROGRESS", meta=progress)
+        if page.next_cursor is None:
+            return progress
+        after = page.next_cursor
+
 @celery.task(name="send_confirm_email")
 def send_confirm_email(
     to: str, username: str
 ):
     try:
-        smtp_server = celery.conf.smtp_server
-        smtp_port = celery.conf.smtp_port
-        smtp_username = celery.conf.smtp_username
-        smtp_password = celery.conf.smtp_password
-        email_from = celery.conf.email_from
-
-        msg = MIMEMultipart()
-        msg["From"] = email_from
-        msg["To"] = to
-        msg["Subject"] = "Подтвердите свою почту"
+        subject = "Подтвердите свою почту"
         token = generate_confirmation_token(to)
         confirm_url = f"{link_api}/users/confirm/{token}"
         body = f"""
@@ -212,10 +185,7 @@ def send_confirm_email(
         <hr style='border: none; border-top: 1px solid #ddd; margin: 20px 0;'>
         <p style='font-size: 14px; color: #666;'>Если у вас есть вопросы, напишите нам на почту <a href='mailto:sport@skkrondo.ru' style='color: #4F46E5;'>sport@skkrondo.ru</a>.</p>
         """
-        msg.attach(MIMEText(body, "html"))
-        with smtplib.SMTP_SSL(smtp_server, smtp_port) as server:
-            server.login(smtp_username, smtp_password)
-            server.send_message(msg)
+        send_html_email(to, subject, body)
         return {"status": "success"}
     except Exception as e:
         logger.error(f"Ошибка {str(e)}")
@@ -226,16 +196,7 @@ def send_forgot_password_email(
     to: str, username: str, token: str
 ):
     try:
-        smtp_server = celery.conf.smtp_server
-        smtp_port = celery.conf.smtp_port
-        smtp_username = celery.conf.smtp_username
-        smtp_password = celery.conf.smtp_password
-        email_from = celery.conf.email_from
-
-        msg = MIMEMultipart()
-        msg["From"] = email_from
-        msg["To"] = to
-        msg["Subject"] = "Сброс пароля"
+        subject = "Сброс пароля"
         confirm_url = f"{link_front}/reset-password?token={token}"
         body = f"""
         <h1 style='font-size: 24px; color: #4F46E5;'>Привет, {username}!</h1>
@@ -246,17 +207,26 @@ def send_forgot_password_email(
         <hr style='border: none; border-top: 1px solid #ddd; margin: 20px 0;'>
         <p style='font-size: 14px; color: #666;'>Если у вас есть вопросы, напишите нам на почту <a href='mailto:sport@skkrondo.ru' style='color: #4F46E5;'>sport@skkrondo.ru</a>.</p>
         """
-        msg.attach(MIMEText(body, "html"))
-        with smtplib.SMTP_SSL(smtp_server, smtp_port) as server:
-            server.login(smtp_username, smtp_password)
-            server.send_message(msg)
+        send_html_email(to, subject, body)
         return {"status": "success"}
     except Exception as e:
         logger.error(f"Ошибка {str(e)}")
         return {"status": "error", "message": str(e)}
+@celery.task(name="expire_court_holds", ignore_result=False)
+def expire_court_holds() -> dict:
+    """Периодическая (beat) очистка неоплаченных броней старше COURT_HOLD_TTL минут"""
+    created_before = datetime.utcnow() - timedelta(minutes=celery.conf.court_hold_ttl)
+    expired = run_async(CourtReservationDAO.expire_holds(created_before))
+    logger.info(f"Снято неоплаченных броней кортов: {expired}", extra={"court_holds_expired": expired})
+    court_holds_expired.inc(expired)
+    return {"expired": expired}
+
+
+# Брони больше не ставят отложенную задачу, cancel_if_not_confirmed оставлена,
+# чтобы уже лежащие в брокере задачи выполнились после обновления
 @celery.task(name="cancel_if_not_confirmed")
 def cancel_if_not_confirmed(reservation_id: int) -> str:
-    asyncio.run(inner(reservation_id))
+    run_async(inner(reservation_id))
 
 
 async def inner(reservation_id: int):
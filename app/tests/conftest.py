@@ -1,16 +1,22 @@
 import pytest
 import json
 from datetime import datetime
-from sqlalchemy import insert, select
+from sqlalchemy import event, insert, select, text
 from httpx import AsyncClient, ASGITransport
 from app.database import Base, async_session_maker, async_engine
 from app.config import settings
+from app.users.auth import create_access_token
 from app.users.model import User
+from app.courts.model import Court
 from app.events.model import Event
 from app.registration.model import Registration
 from app.additional_registration.model import Registration_additional
+from app.events.dao import EventDao
 from app.main import app as fastapi_app
+from app.cache import init_cache
+from fastapi_cache import FastAPICache
 import asyncio
+import uuid
 
 def parse_datetime(value: str):
     """Конвертирует строку в объект datetime."""
@@ -93,6 +99,17 @@ async def prepare_database():
         finally:
             await session.close()
 
+    # Моки вставлены с явными id: сдвигаем последовательности, иначе следующая
+    # запись без id получит уже занятый ключ
+    async with async_engine.begin() as conn:
+        for table in ("users", "event", "registration", "registration_additional"):
+            await conn.execute(text(
+                f"SELECT setval(pg_get_serial_sequence('{table}', 'id'), COALESCE(MAX(id), 0) + 1, false) FROM {table}"
+            ))
+
+    # Моки пишут записи напрямую, счетчики ивентов пересчитываем по ним
+    await EventDao.reconcile_counters()
+
     # Финальная проверка
     async with async_session_maker() as session:
         try:
@@ -102,6 +119,94 @@ async def prepare_database():
         finally:
             await session.close()
 
+class QueryCounter:
+    """SQL-запросы, выполненные за время теста"""
+
+    def __init__(self):
+        self.statements: list[str] = []
+
+    @property
+    def count(self) -> int:
+        return len(self.statements)
+
+    def __call__(self, conn, cursor, statement, parameters, context, executemany):
+        self.statements.append(statement)
+
+    def reset(self):
+        self.statements.clear()
+
+
+@pytest.fixture(scope="function")
+def queries():
+    """Счетчик SQL-запросов к тестовой БД; сбросьте его перед проверяемым вызовом"""
+    counter = QueryCounter()
+    event.listen(async_engine.sync_engine, "before_cursor_execute", counter)
+    yield counter
+    event.remove(async_engine.sync_engine, "before_cursor_execute", counter)
+
+
+@pytest.hookimpl(wrapper=True)
+def pytest_runtest_call(item):
+    """
+    @pytest.mark.query_budget(n): тест падает, если выполнил больше n SQL-запросов.
+    Считаются запросы самого теста, без подготовки БД в фикстурах.
+    """
+    marker = item.get_closest_marker("query_budget")
+    if marker is None:
+        return (yield)
+    counter = QueryCounter()
+    event.listen(async_engine.sync_engine, "before_cursor_execute", counter)
+    try:
+        result = yield
+    finally:
+        event.remove(async_engine.sync_engine, "before_cursor_execute", counter)
+    budget = marker.args[0]
+    if counter.count > budget:
+        statements = "\n\n".join(counter.statements)
+        pytest.fail(f"Выполнено {counter.count} SQL-запросов при бюджете {budget}:\n{statements}")
+    return result
+
+
+@pytest.fixture
+def make_users():
+    """Создать count активных пользователей с именем и фамилией, вернуть их id"""
+    async def make(count: int) -> list[int]:
+        async with async_session_maker() as session:
+            ids = (await session.execute(insert(User).returning(User.id), [
+                {
+                    "email": f"{uuid.uuid4().hex}@test.ru",
+                    "username": uuid.uuid4().hex,
+                    "hashed_password": "",
+                    "is_active": True,
+                    "first_name": "Тест",
+                    "last_name": "Тестов",
+                }
+                for _ in range(count)
+            ])).scalars().all()
+            await session.commit()
+        return list(ids)
+    return make
+
+
+@pytest.fixture
+async def court_id() -> int:
+    """Свой корт на каждый тест, чтобы слоты тестов не пересекались"""
+    async with async_session_maker() as session:
+        court_id = (await session.execute(
+            insert(Court).values(name="Корт", price=1000, is_available=True).returning(Court.id)
+        )).scalar()
+        await session.commit()
+    return court_id
+
+
+@pytest.fixture
+def auth_cookies():
+    """Cookie с токеном пользователя для запросов от его имени"""
+    def cookies(user_id: int) -> dict:
+        return {"_user_cookie": create_access_token({"sub": str(user_id)})}
+    return cookies
+
+
 @pytest.fixture(scope="function")
 async def ac():
     """Фикстура для асинхронного клиента"""
@@ -111,13 +216,16 @@ async def ac():
     ) as client:
         yield client
 
-# @pytest.fixture(scope="function", autouse=True)
-# async def clear_cache():
-#     """Очистка кеша перед каждым тестом"""
-#     from fastapi_cache import caches
-#     #from app.database import cache
-#     caches.set("default", cache)
-#     #await cache.clear()
+@pytest.fixture(scope="session", autouse=True)
+def cache():
+    """ASGITransport не запускает lifespan, кеш (InMemory в TEST) поднимаем сами"""
+    init_cache()
+
+
+@pytest.fixture(scope="function", autouse=True)
+async def clear_cache():
+    """Очистка кеша перед каждым тестом"""
+    await FastAPICache.clear()
 
 @pytest.fixture(scope="session")
 def event_loop():
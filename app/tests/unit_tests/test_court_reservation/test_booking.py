@@ -0,0 +1,93 @@
+import asyncio
+from datetime import date, timedelta
+
+import pytest
+from fastapi import HTTPException
+from httpx import AsyncClient
+from sqlalchemy import func, select
+from sqlalchemy.exc import IntegrityError
+
+from app.court_reservation.dao import CourtReservationDAO
+from app.court_reservation.model import CourtReservation
+from app.database import async_session_maker
+from app.payments.service import PaymentGatewayError, payment_gateway
+
+TOMORROW = date.today() + timedelta(days=1)
+
+
+async def count_reservations(court_id: int) -> int:
+    async with async_session_maker() as session:
+        query = select(func.count()).select_from(CourtReservation).where(CourtReservation.court_id == court_id)
+        return (await session.execute(query)).scalar()
+
+
+async def test_parallel_booking_of_one_slot(court_id, make_users):
+    user_ids = await make_users(5)
+
+    results = await asyncio.gather(
+        *(CourtReservationDAO.book(user_id=user_id, court_id=court_id, date=TOMORROW, time=10) for user_id in user_ids),
+        return_exceptions=True,
+    )
+
+    booked = [result for result in results if isinstance(result, CourtReservation)]
+    conflicts = [result for result in results if isinstance(result, HTTPException)]
+    assert len(booked) == 1
+    assert len(conflicts) == 4
+    assert all(error.status_code == 409 for error in conflicts)
+    assert await count_reservations(court_id) == 1
+
+
+async def test_taken_slot_returns_409(ac: AsyncClient, court_id, make_users, auth_cookies):
+    first, second = await make_users(2)
+    slot = {"court_id": court_id, "date": str(TOMORROW), "time": 11}
+
+    response = await ac.post("/court_reservations/temporary", json=slot, cookies=auth_cookies(first))
+    assert response.status_code == 200
+    response = await ac.post("/court_reservations/temporary", json=slot, cookies=auth_cookies(second))
+    assert response.status_code == 409
+    # вторая бронь не появилась, слот занят первой
+    assert await count_reservations(court_id) == 1
+
+
+async def test_other_integrity_errors_are_not_409(court_id):
+    # несуществующий пользователь - нарушение внешнего ключа, а не занятый слот
+    with pytest.raises(IntegrityError):
+        await CourtReservationDAO.book(user_id=10**9, court_id=court_id, date=TOMORROW, time=12)
+    assert await count_reservations(court_id) == 0
+
+
+async def test_gateway_failure_releases_the_slot(ac: AsyncClient, court_id, make_users, auth_cookies, monkeypatch):
+    (user_id,) = await make_users(1)
+    slot = {"court_id": court_id, "date": str(TOMORROW), "time": 13}
+
+    async def unavailable(**kwargs):
+        raise PaymentGatewayError("недоступен")
+
+    with monkeypatch.context() as patch:
+        patch.setattr(payment_gateway, "create_payment", unavailable)
+        response = await ac.post("/court_reservations/temporary", json=slot, cookies=auth_cookies(user_id))
+    assert response.status_code == 502
+    assert await count_reservations(court_id) == 0
+
+    response = await ac.post("/court_reservations/temporary", json=slot, cookies=auth_cookies(user_id))
+    assert response.status_code == 200
+    assert await count_reservations(court_id) == 1
+
+
+async def test_my_reservations_total_counts_all_pages(ac: AsyncClient, court_id, make_users, auth_cookies):
+    (user_id,) = await make_users(1)
+    for time in (9, 10, 11):
+        await CourtReservationDAO.book(user_id=user_id, court_id=court_id, date=TOMORROW, time=time, is_confirmed=True)
+
+    response = await ac.get("/court_reservations/my_reservations", params={"limit": 2}, cookies=auth_cookies(user_id))
+    assert response.status_code == 200
+    body = response.json()
+    assert len(body["items"]) == 2
+    assert body["total"] == 3
+    assert body["next_cursor"]
+
+    # без limit - все брони одним ответом, как до пагинации
+    response = await ac.get("/court_reservations/my_reservations", cookies=auth_cookies(user_id))
+    body = response.json()
+    assert len(body["items"]) == body["total"] == 3
+    assert body["next_cursor"] is None
@@ -0,0 +1,109 @@
+import logging
+from datetime import date, datetime, timedelta
+
+import pytest
+from httpx import AsyncClient
+from sqlalchemy import insert, select
+
+from app.config import settings
+from app.court_reservation import router as court_router
+from app.court_reservation.dao import CourtReservationDAO
+from app.court_reservation.model import CourtReservation
+from app.database import async_session_maker
+from app.payments.service import generate_secure_rental_id
+
+
+@pytest.fixture
+def sent_notifications(monkeypatch):
+    """Письмо и сообщение в Telegram вместо брокера складываются в список"""
+    sent = []
+    monkeypatch.setattr(court_router.send_about_registration_on_court, "delay", lambda **kwargs: sent.append(kwargs))
+    monkeypatch.setattr(court_router.send_notification_telegram, "delay", lambda **kwargs: sent.append(kwargs))
+    return sent
+
+
+async def make_hold(court_id: int, user_id: int, payment_id: str, time: int = 15, created_at: datetime | None = None, is_confirmed: bool = False) -> int:
+    async with async_session_maker() as session:
+        reservation_id = (await session.execute(insert(CourtReservation).values(
+            court_id=court_id,
+            user_id=user_id,
+            date=date.today() + timedelta(days=1),
+            time=time,
+            is_confirmed=is_confirmed,
+            payment_id=payment_id,
+            created_at=created_at or datetime.utcnow(),
+        ).returning(CourtReservation.id))).scalar()
+        await session.commit()
+    return reservation_id
+
+
+def succeeded(payment_id: str, reservation_id: int) -> dict:
+    return {
+        "event": "payment.succeeded",
+        "object": {
+            "id": payment_id,
+            "status": "succeeded",
+            "metadata": {
+                "rental_id": str(reservation_id),
+                "rental_signature": generate_secure_rental_id(str(reservation_id), settings.SECRET_KEY),
+            },
+        },
+    }
+
+
+async def test_repeated_webhook_is_idempotent(ac: AsyncClient, court_id, make_users, sent_notifications):
+    (user_id,) = await make_users(1)
+    reservation_id = await make_hold(court_id, user_id, "pay-repeat")
+
+    response = await ac.post("/court_reservations/yookassa/webhook", json=succeeded("pay-repeat", reservation_id))
+    assert response.json() == {"status": "success"}
+    response = await ac.post("/court_reservations/yookassa/webhook", json=succeeded("pay-repeat", reservation_id))
+    assert response.json() == {"status": "duplicate"}
+
+    async with async_session_maker() as session:
+        is_confirmed = (await session.execute(
+            select(CourtReservation.is_confirmed).where(CourtReservation.id == reservation_id)
+        )).scalar()
+    assert is_confirmed is True
+    # письмо и сообщение в Telegram - по одному разу
+    assert len(sent_notifications) == 2
+
+
+async def test_webhook_with_bad_signature(ac: AsyncClient, court_id, make_users):
+    (user_id,) = await make_users(1)
+    reservation_id = await make_hold(court_id, user_id, "pay-forged")
+    payload = succeeded("pay-forged", reservation_id)
+    payload["object"]["metadata"]["rental_signature"] = "0" * 64
+
+    response = await ac.post("/court_reservations/yookassa/webhook", json=payload)
+    assert response.status_code == 403
+
+
+async def test_expire_holds_removes_only_old_unpaid(court_id, make_users):
+    (user_id,) = await make_users(1)
+    old = datetime.utcnow() - timedelta(hours=1)
+    expired_id = await make_hold(court_id, user_id, "pay-old", time=16, created_at=old)
+    paid_id = await make_hold(court_id, user_id, "pay-paid", time=17, created_at=old, is_confirmed=True)
+    fresh_id = await make_hold(court_id, user_id, "pay-fresh", time=18)
+
+    await CourtReservationDAO.expire_holds(datetime.utcnow() - timedelta(minutes=15))
+
+    async with async_session_maker() as session:
+        left = set((await session.execute(
+            select(CourtReservation.id).where(CourtReservation.court_id == court_id)
+        )).scalars())
+    assert left == {paid_id, fresh_id}
+    assert expired_id not in left
+
+
+async def test_webhook_for_expired_hold_is_reported(ac: AsyncClient, court_id, make_users, sent_notifications, caplog):
+    (user_id,) = await make_users(1)
+    reservation_id = await make_hold(court_id, user_id, "pay-late", created_at=datetime.utcnow() - timedelta(hours=1))
+    await CourtReservationDAO.expire_holds(datetime.utcnow() - timedelta(minutes=15))
+
+    with caplog.at_level(logging.ERROR, logger=court_router.logger.name):
+        response = await ac.post("/court_reservations/yookassa/webhook", json=succeeded("pay-late", reservation_id))
+
+    assert response.json() == {"status": "missing"}
+    assert any(record.payment_id == "pay-late" for record in caplog.records)
+    assert sent_notifications == []
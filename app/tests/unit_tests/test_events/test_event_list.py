@@ -0,0 +1,60 @@
+from datetime import UTC, datetime, timedelta
+
+from httpx import AsyncClient
+from sqlalchemy import delete, insert
+
+from app.database import async_session_maker
+from app.events.model import Event
+
+
+async def make_events(*start_times: datetime) -> list[int]:
+    async with async_session_maker() as session:
+        event_ids = (await session.execute(
+            insert(Event).returning(Event.id),
+            [{"title": f"Ивент {i}", "description": "Описание", "max_members": 5, "start_time": start}
+             for i, start in enumerate(start_times)],
+        )).scalars().all()
+        await session.commit()
+    return event_ids
+
+
+async def delete_events(event_ids: list[int]):
+    async with async_session_maker() as session:
+        await session.execute(delete(Event).where(Event.id.in_(event_ids)))
+        await session.commit()
+
+
+async def test_events_without_limit_are_all_upcoming_first(ac: AsyncClient):
+    now = datetime.now(UTC)
+    event_ids = await make_events(now - timedelta(days=400), now + timedelta(days=400), now + timedelta(days=1))
+    try:
+        response = await ac.get("/events/")
+        assert response.status_code == 200
+        assert "X-Next-Cursor" not in response.headers
+        starts = [datetime.fromisoformat(event["start_time"]) for event in response.json()]
+        upcoming = [start > now for start in starts]
+        # сначала все предстоящие, затем прошедшие, внутри - по времени начала
+        assert upcoming == sorted(upcoming, reverse=True)
+        assert starts[:sum(upcoming)] == sorted(starts[:sum(upcoming)])
+        assert starts[sum(upcoming):] == sorted(starts[sum(upcoming):])
+        assert set(event_ids) <= {event["id"] for event in response.json()}
+    finally:
+        await delete_events(event_ids)
+
+
+async def test_events_pages_cover_the_whole_list(ac: AsyncClient):
+    everything = (await ac.get("/events/")).json()
+
+    seen, params = [], {"limit": 2}
+    while True:
+        response = await ac.get("/events/", params=params)
+        assert response.status_code == 200
+        assert len(response.json()) <= 2
+        seen += [event["id"] for event in response.json()]
+        cursor = response.headers.get("X-Next-Cursor")
+        if cursor is None:
+            break
+        params = {"limit": 2, "after": cursor}
+
+    assert sorted(seen) == sorted(event["id"] for event in everything)
+    assert len(seen) == len(set(seen))
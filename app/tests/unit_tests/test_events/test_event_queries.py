@@ -0,0 +1,61 @@
+from datetime import UTC, datetime, timedelta
+
+import pytest
+from fastapi_cache import FastAPICache
+from httpx import AsyncClient
+from sqlalchemy import delete, insert
+
+from app.database import async_session_maker
+from app.event_tags.model import EventTag
+from app.events.model import Event
+from app.tags.model import Tag
+
+
+@pytest.mark.query_budget(3)
+async def test_events_list_query_budget(ac: AsyncClient):
+    response = await ac.get("/events/")
+    assert response.status_code == 200
+    assert len(response.json()) > 1
+
+
+@pytest.mark.query_budget(3)
+async def test_event_detail_query_budget(ac: AsyncClient):
+    response = await ac.get("/events/1")
+    assert response.status_code == 200
+
+
+async def test_events_list_queries_do_not_grow(ac: AsyncClient, queries):
+    """Число запросов списка не зависит от числа ивентов и тэгов на странице (нет N+1)"""
+    queries.reset()
+    response = await ac.get("/events/")
+    assert response.status_code == 200
+    before, shown = queries.count, len(response.json())
+
+    async with async_session_maker() as session:
+        start = datetime.now(UTC) + timedelta(days=365)
+        event_ids = (await session.execute(
+            insert(Event).returning(Event.id),
+            [{"title": f"Ивент {i}", "description": "Описание", "max_members": 5, "start_time": start} for i in range(5)],
+        )).scalars().all()
+        tag_ids = (await session.execute(
+            insert(Tag).returning(Tag.id),
+            [{"name": f"query-test-{i}"} for i in range(3)],
+        )).scalars().all()
+        await session.execute(insert(EventTag), [
+            {"event_id": event_id, "tag_id": tag_id} for event_id in event_ids for tag_id in tag_ids
+        ])
+        await session.commit()
+
+    try:
+        await FastAPICache.clear()
+        queries.reset()
+        response = await ac.get("/events/")
+        assert response.status_code == 200
+        assert len(response.json()) > shown
+        assert queries.count == before
+    finally:
+        async with async_session_maker() as session:
+            await session.execute(delete(EventTag).where(EventTag.event_id.in_(event_ids)))
+            await session.execute(delete(Event).where(Event.id.in_(event_ids)))
+            await session.execute(delete(Tag).where(Tag.id.in_(tag_ids)))
+            await session.commit()
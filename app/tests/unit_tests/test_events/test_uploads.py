@@ -0,0 +1,39 @@
+import io
+
+import pytest
+from fastapi import HTTPException
+
+from app.config import settings
+from app.events import uploads
+
+PNG = b"\x89PNG\r\n\x1a\n" + b"\x00" * 64
+
+
+@pytest.fixture
+def upload_dir(tmp_path, monkeypatch):
+    monkeypatch.setattr(uploads, "UPLOAD_DIR", str(tmp_path))
+    return tmp_path
+
+
+def test_store_image_dedupes_by_content(upload_dir):
+    first = uploads.store_image(io.BytesIO(PNG))
+    second = uploads.store_image(io.BytesIO(PNG))
+
+    assert first == second
+    assert first.endswith(".png")
+    assert [path.name for path in upload_dir.iterdir()] == [first]
+    # WebP-копии делает задача make_image_variants, пока их нет - не отдаем адреса
+    assert uploads.variant_urls(uploads.upload_url(first)) == {}
+
+
+def test_store_image_rejects_bad_type_and_size(upload_dir, monkeypatch):
+    with pytest.raises(HTTPException) as error:
+        uploads.store_image(io.BytesIO(b"<svg onload=alert(1)>"))
+    assert error.value.status_code == 415
+
+    monkeypatch.setattr(settings, "UPLOAD_MAX_SIZE", 16)
+    with pytest.raises(HTTPException) as error:
+        uploads.store_image(io.BytesIO(PNG))
+    assert error.value.status_code == 413
+    # недописанный файл не остается в uploads
+    assert list(upload_dir.iterdir()) == []
@@ -0,0 +1,42 @@
+import time
+from unittest.mock import MagicMock
+
+import pytest
+from sqlalchemy.exc import TimeoutError
+from sqlalchemy.util import greenlet_spawn
+
+from app.database import MeteredPool
+
+CONNECT_SECONDS = 0.05
+POOL_TIMEOUT = 0.05
+
+
+def slow_connect():
+    time.sleep(CONNECT_SECONDS)
+    return MagicMock()
+
+
+def checkout_twice(pool: MeteredPool):
+    first = pool.connect()
+    with pytest.raises(TimeoutError):
+        pool.connect()
+    first.close()
+
+
+async def test_connect_time_is_not_counted_as_wait():
+    pool = MeteredPool(slow_connect, pool_size=1, max_overflow=0, timeout=POOL_TIMEOUT)
+
+    connection = await greenlet_spawn(pool.connect)
+    await greenlet_spawn(connection.close)
+
+    assert pool._pool.wait_count == 0
+    assert pool._pool.wait_seconds == 0
+
+
+async def test_exhausted_pool_counts_queue_wait():
+    pool = MeteredPool(slow_connect, pool_size=1, max_overflow=0, timeout=POOL_TIMEOUT)
+
+    await greenlet_spawn(checkout_twice, pool)
+
+    assert pool._pool.wait_count == 1
+    assert POOL_TIMEOUT <= pool._pool.wait_seconds < POOL_TIMEOUT + CONNECT_SECONDS
@@ -0,0 +1,95 @@
+import asyncio
+from datetime import UTC, datetime, timedelta
+
+import pytest
+from httpx import AsyncClient
+from sqlalchemy import func, insert, select
+
+from app.additional_registration.dao import RegistrationAddDao
+from app.database import async_session_maker
+from app.events.dao import EventDao
+from app.events.model import Event
+from app.registration import router as registration_router
+from app.registration.dao import RegistrationDao, RegistrationStatus
+from app.registration.model import Registration
+
+
+async def make_event(max_members: int, additional_members: int = 0) -> int:
+    async with async_session_maker() as session:
+        event_id = (await session.execute(insert(Event).values(
+            title="Запись",
+            description="Описание",
+            max_members=max_members,
+            additional_members=additional_members,
+            start_time=datetime.now(UTC) + timedelta(days=7),
+        ).returning(Event.id))).scalar()
+        await session.commit()
+    return event_id
+
+
+@pytest.fixture
+def sent_mail(monkeypatch):
+    """Письма о записи вместо брокера складываются в список"""
+    sent = []
+    monkeypatch.setattr(registration_router.send_about_registration, "delay", lambda **kwargs: sent.append(kwargs))
+    return sent
+
+
+async def test_parallel_registrations_do_not_overbook(make_users):
+    event_id = await make_event(max_members=2)
+    user_ids = await make_users(6)
+
+    results = await asyncio.gather(*(RegistrationDao.register(event_id, user_id) for user_id in user_ids))
+
+    statuses = [result.status for result in results]
+    assert statuses.count(RegistrationStatus.created) == 2
+    assert statuses.count(RegistrationStatus.full) == 4
+    async with async_session_maker() as session:
+        registered = (await session.execute(
+            select(func.count()).select_from(Registration).where(Registration.event_id == event_id)
+        )).scalar()
+        count_members = (await session.execute(select(Event.count_members).where(Event.id == event_id))).scalar()
+    assert registered == count_members == 2
+
+
+async def test_registration_mail_only_for_committed_registration(ac: AsyncClient, make_users, auth_cookies, sent_mail):
+    event_id = await make_event(max_members=1)
+    first, second = await make_users(2)
+
+    response = await ac.post(f"/users/registration/{event_id}", cookies=auth_cookies(first))
+    assert response.status_code == 200
+    assert len(sent_mail) == 1
+
+    response = await ac.post(f"/users/registration/{event_id}", cookies=auth_cookies(second))
+    assert response.status_code == 409
+    assert len(sent_mail) == 1
+
+
+async def test_waitlist_is_limited_by_additional_members(make_users):
+    event_id = await make_event(max_members=1, additional_members=2)
+    user_ids = await make_users(5)
+
+    results = await asyncio.gather(*(RegistrationAddDao.register(event_id, user_id) for user_id in user_ids))
+
+    statuses = [result.status for result in results]
+    assert statuses.count(RegistrationStatus.created) == 2
+    assert statuses.count(RegistrationStatus.full) == 3
+    async with async_session_maker() as session:
+        event = (await session.execute(select(Event).where(Event.id == event_id))).scalar()
+    # вместимость листа ожидания не затирается счетчиком
+    assert (event.additional_members, event.count_additional) == (2, 2)
+
+
+async def test_reconcile_counters_of_one_event(make_users):
+    first_id, second_id = await make_event(max_members=5), await make_event(max_members=5)
+    (user_id,) = await make_users(1)
+    async with async_session_maker() as session:
+        # записи мимо DAO, как из админки
+        await session.execute(insert(Registration), [
+            {"event_id": first_id, "user_id": user_id},
+            {"event_id": second_id, "user_id": user_id},
+        ])
+        await session.commit()
+
+    assert await EventDao.reconcile_counters(first_id) == [first_id]
+    assert await EventDao.reconcile_counters(second_id) == [second_id]
@@ -0,0 +1,59 @@
+from datetime import UTC, datetime
+
+import pytest
+from sqlalchemy import event, func, select
+
+from app.database import async_engine, async_session_maker
+from app.tasks import tasks
+from app.tasks.celery_app import celery
+from app.users.model import User
+
+
+class FakeTask:
+    def __init__(self):
+        self.states = []
+
+    def update_state(self, state, meta):
+        self.states.append(dict(meta))
+
+
+@pytest.fixture
+def open_connections():
+    """Число соединений с БД, взятых из пула прямо сейчас"""
+    opened = [0]
+
+    def checkout(*args):
+        opened[0] += 1
+
+    def checkin(*args):
+        opened[0] -= 1
+
+    event.listen(async_engine.sync_engine, "checkout", checkout)
+    event.listen(async_engine.sync_engine, "checkin", checkin)
+    yield opened
+    event.remove(async_engine.sync_engine, "checkout", checkout)
+    event.remove(async_engine.sync_engine, "checkin", checkin)
+
+
+async def test_broadcast_sends_between_batches(make_users, open_connections, monkeypatch):
+    await make_users(3)
+    async with async_session_maker() as session:
+        emails = (await session.execute(select(User.email).order_by(User.id))).scalars().all()
+        total = (await session.execute(select(func.count(User.id)))).scalar()
+    sent = []
+
+    def send(to, subject, body):
+        # письма уходят без открытого соединения с БД
+        assert open_connections[0] == 0
+        sent.append(to)
+
+    monkeypatch.setattr(tasks, "send_html_email", send)
+    monkeypatch.setattr(celery.conf, "mail_batch_size", 2)
+    monkeypatch.setattr(celery.conf, "mail_rate_limit", 10_000)
+    task = FakeTask()
+
+    result = await tasks.broadcast(task, "Ивент", datetime.now(UTC))
+
+    assert sent == list(emails)
+    assert result == {"sent": total, "failed": 0, "total": total}
+    assert len(task.states) == (total + 1) // 2
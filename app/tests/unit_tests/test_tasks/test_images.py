@@ -0,0 +1,71 @@
+import asyncio
+import io
+
+import pytest
+from httpx import AsyncClient
+from PIL import Image
+from sqlalchemy import delete, insert
+
+from app.config import settings
+from app.database import async_session_maker
+from app.events import uploads
+from app.events.model import Event
+from app.tasks import images, runtime
+
+
+@pytest.fixture
+def upload_dir(tmp_path, monkeypatch):
+    monkeypatch.setattr(uploads, "UPLOAD_DIR", str(tmp_path))
+    monkeypatch.setattr(images, "UPLOAD_DIR", str(tmp_path))
+    return tmp_path
+
+
+def store_png(color: str) -> str:
+    source = io.BytesIO()
+    Image.new("RGB", (2000, 1000), color).save(source, "PNG")
+    source.seek(0)
+    return uploads.store_image(source)
+
+
+def test_make_image_variants_writes_every_width(upload_dir):
+    filename = store_png("red")
+
+    result = images.make_image_variants(filename)
+
+    assert len(result["variants"]) == len(settings.IMAGE_VARIANT_WIDTHS)
+    for width in settings.IMAGE_VARIANT_WIDTHS.values():
+        with Image.open(upload_dir / uploads.variant_name(filename, width)) as variant:
+            assert variant.format == "WEBP"
+            assert variant.size == (width, width // 2)
+    assert set(uploads.variant_urls(uploads.upload_url(filename))) == set(settings.IMAGE_VARIANT_WIDTHS)
+    # повторный запуск для той же картинки ничего не пересоздает
+    assert images.make_image_variants(filename)["variants"] == []
+
+
+async def test_variants_reach_the_cached_event(ac: AsyncClient, upload_dir, monkeypatch):
+    filename = store_png("blue")
+    async with async_session_maker() as session:
+        event_id = (await session.execute(
+            insert(Event).returning(Event.id),
+            {"title": "Обложка", "description": "Описание", "max_members": 5, "media_url": uploads.upload_url(filename)},
+        )).scalar()
+        await session.commit()
+
+    try:
+        # страница ивента попала в кеш, пока копий еще нет
+        response = await ac.get(f"/events/{event_id}")
+        assert response.json()["media_variants"] == {}
+
+        # задача работает в воркере, вне event loop API, со своим loop
+        monkeypatch.setattr(runtime, "loop", None)
+        result = await asyncio.to_thread(images.make_image_variants, filename)
+        runtime.loop.close()
+        assert result["events"] == [event_id]
+
+        response = await ac.get(f"/events/{event_id}")
+        assert response.json()["media_variants"] == uploads.variant_urls(uploads.upload_url(filename))
+        assert set(response.json()["media_variants"]) == set(settings.IMAGE_VARIANT_WIDTHS)
+    finally:
+        async with async_session_maker() as session:
+            await session.execute(delete(Event).where(Event.id == event_id))
+            await session.commit()
@@ -0,0 +1,58 @@
+import socket
+
+import pytest
+from aiosmtpd.controller import Controller
+
+from app.tasks.celery_app import celery
+from app.tasks.smtp import send_html_email, smtp_connection
+
+
+class Handler:
+    def __init__(self):
+        self.messages = []
+        self.sessions = 0
+
+    async def handle_EHLO(self, server, session, envelope, hostname, responses):
+        self.sessions += 1
+        session.host_name = hostname
+        return responses
+
+    async def handle_DATA(self, server, session, envelope):
+        self.messages.append(envelope)
+        return "250 OK"
+
+
+@pytest.fixture
+def smtp_server(monkeypatch):
+    """Локальный SMTP-сервер без TLS и авторизации"""
+    with socket.socket() as sock:
+        sock.bind(("127.0.0.1", 0))
+        port = sock.getsockname()[1]
+    handler = Handler()
+    controller = Controller(handler, hostname="127.0.0.1", port=port)
+    controller.start()
+    monkeypatch.setattr(celery.conf, "smtp_server", controller.hostname)
+    monkeypatch.setattr(celery.conf, "smtp_port", controller.port)
+    monkeypatch.setattr(celery.conf, "smtp_ssl", False)
+    monkeypatch.setattr(celery.conf, "smtp_username", "")
+    yield handler
+    smtp_connection.close()
+    controller.stop()
+
+
+def test_connection_is_reused(smtp_server):
+    send_html_email("first@test.ru", "Тема", "<p>1</p>")
+    send_html_email("second@test.ru", "Тема", "<p>2</p>")
+
+    assert [m.rcpt_tos for m in smtp_server.messages] == [["first@test.ru"], ["second@test.ru"]]
+    assert smtp_server.sessions == 1
+
+
+def test_reconnect_after_disconnect(smtp_server):
+    send_html_email("first@test.ru", "Тема", "<p>1</p>")
+    # соединение оборвалось между задачами
+    smtp_connection.server.close()
+    send_html_email("second@test.ru", "Тема", "<p>2</p>")
+
+    assert len(smtp_server.messages) == 2
+    assert smtp_server.sessions == 2
@@ -0,0 +1,44 @@
+import asyncio
+import time
+
+from fastapi import HTTPException
+
+from app.config import settings
+from app.users import auth
+
+
+async def test_hash_and_verify():
+    hashed = await auth.get_password_hash("secret")
+
+    assert await auth.verify_password("secret", hashed)
+    assert not await auth.verify_password("wrong", hashed)
+    assert not await auth.verify_password("secret", "not-a-hash")
+
+
+async def test_hashing_does_not_block_event_loop():
+    ticks = 0
+
+    async def ticker():
+        nonlocal ticks
+        while True:
+            await asyncio.sleep(0.001)
+            ticks += 1
+
+    task = asyncio.create_task(ticker())
+    await auth.run_hasher(time.sleep, 0.2)
+    task.cancel()
+    # при хешировании в event loop тикер не успел бы ни разу
+    assert ticks > 10
+
+
+async def test_busy_hasher_answers_503(monkeypatch):
+    monkeypatch.setattr(settings, "PASSWORD_HASH_WORKERS", 1)
+    monkeypatch.setattr(settings, "PASSWORD_HASH_QUEUE", 0)
+
+    results = await asyncio.gather(
+        auth.run_hasher(time.sleep, 0.2), auth.run_hasher(time.sleep, 0.2), return_exceptions=True,
+    )
+
+    errors = [result for result in results if isinstance(result, HTTPException)]
+    assert [error.status_code for error in errors] == [503]
+    assert auth.hash_in_flight == 0
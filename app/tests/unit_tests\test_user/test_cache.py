@@ -0,0 +1,33 @@
+from fastapi_cache import FastAPICache
+from httpx import AsyncClient
+
+from app.users.dao import UsersDao
+
+
+async def test_user_changes_apply_to_next_request(ac: AsyncClient, make_users, auth_cookies):
+    (user_id,) = await make_users(1)
+    cookies = auth_cookies(user_id)
+
+    response = await ac.get("/users/me", cookies=cookies)
+    assert response.json()["admin_status"] == "user"
+
+    await UsersDao.update(user_id, "admin_status", "admin")
+    response = await ac.get("/users/me", cookies=cookies)
+    assert response.json()["admin_status"] == "admin"
+
+    await UsersDao.delete(user_id)
+    response = await ac.get("/users/me", cookies=cookies)
+    assert response.status_code == 400
+
+
+async def test_user_invalidation_keeps_other_cached_responses(ac: AsyncClient, make_users, auth_cookies):
+    (user_id,) = await make_users(1)
+    await ac.get("/users/me", cookies=auth_cookies(user_id))
+    await ac.get("/events/")
+    cached = set(FastAPICache.get_backend()._store)
+
+    await UsersDao.update(user_id, "first_name", "Новое")
+
+    left = set(FastAPICache.get_backend()._store)
+    assert [key for key in cached - left if ":user:" not in key] == []
+    assert any(":events:" in key for key in left)
@@ -1,23 +1,49 @@
+import asyncio
+from concurrent.futures import ThreadPoolExecutor
 from datetime import UTC, datetime, timedelta
 
 from argon2 import PasswordHasher
+from argon2.exceptions import InvalidHashError, VerificationError
 from jose import jwt
 from pydantic import EmailStr
 
 from app.config import settings
-from app.exceptions import IncorrectEMailOrPasswordException
+from app.exceptions import IncorrectEMailOrPasswordException, PasswordHasherBusyException
 from app.users.dao import UsersDao
 from itsdangerous import URLSafeTimedSerializer
 import secrets
-pwd_context = PasswordHasher()
+pwd_context = PasswordHasher(
+    time_cost=settings.ARGON2_TIME_COST,
+    memory_cost=settings.ARGON2_MEMORY_COST,
+    parallelism=settings.ARGON2_PARALLELISM,
+)
 
+# Argon2 считается в отдельном пуле потоков, чтобы не блокировать event loop.
+# Если в очереди уже слишком много паролей, сразу отвечаем 503.
+hash_executor = ThreadPoolExecutor(max_workers=settings.PASSWORD_HASH_WORKERS, thread_name_prefix="argon2")
+hash_in_flight = 0
 
-def get_password_hash(password: str):
-    return pwd_context.hash(password)
+
+async def run_hasher(func, *args):
+    global hash_in_flight
+    if hash_in_flight >= settings.PASSWORD_HASH_WORKERS + settings.PASSWORD_HASH_QUEUE:
+        raise PasswordHasherBusyException
+    hash_in_flight += 1
+    try:
+        return await asyncio.get_running_loop().run_in_executor(hash_executor, func, *args)
+    finally:
+        hash_in_flight -= 1
 
 
-def verify_password(plain_password: str, hashed_password: str) -> bool:
-    return pwd_context.verify(hashed_password, plain_password)
+async def get_password_hash(password: str) -> str:
+    return await run_hasher(pwd_context.hash, password)
+
+
+async def verify_password(plain_password: str, hashed_password: str) -> bool:
+    try:
+        return await run_hasher(pwd_context.verify, hashed_password, plain_password)
+    except (VerificationError, InvalidHashError):
+        return False
 
 
 def create_access_token(data: dict) -> str:
@@ -32,11 +58,12 @@ def create_access_token(data: dict) -> str:
 
 async def auth_user(email: EmailStr, password: str):
     user = await UsersDao.find_one_or_none(email=email)
-    try:
-        if user and verify_password(password, user.hashed_password):
-            return user
-    except Exception:
+    if not user or not await verify_password(password, user.hashed_password):
         raise IncorrectEMailOrPasswordException
+    # хеш со старыми параметрами argon2 пересчитываем, пока пароль известен
+    if pwd_context.check_needs_rehash(user.hashed_password):
+        await UsersDao.update(id=user.id, field="hashed_password", data=await get_password_hash(password))
+    return user
     
 
 SECRET_KEY = settings.SECRET_KEY
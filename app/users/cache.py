@@ -0,0 +1,96 @@
+import logging
+import time
+from collections import OrderedDict
+
+from fastapi_cache import FastAPICache
+from fastapi_cache.coder import JsonCoder
+
+from app.config import settings
+from app.database import on_commit
+
+logger = logging.getLogger(__name__)
+
+
+class CachedUser(dict):
+    """Пользователь из кеша: доступ и по ключу, и по атрибуту, как у RowMapping"""
+
+    def __getattr__(self, name):
+        try:
+            return self[name]
+        except KeyError:
+            raise AttributeError(name)
+
+
+# LRU процесса: user_id -> (момент устаревания, пользователь).
+# С USER_CACHE_REDIS не используется: другие процессы не смогли бы его сбросить
+local_cache: OrderedDict[int, tuple[float, CachedUser]] = OrderedDict()
+
+
+def redis_key(user_id: int) -> str:
+    return f"{FastAPICache.get_prefix()}:user:{user_id}"
+
+
+async def get_user(user_id: int) -> CachedUser | None:
+    if settings.USER_CACHE_TTL <= 0:
+        return None
+    if not settings.USER_CACHE_REDIS:
+        return get_local(user_id)
+    try:
+        value = await FastAPICache.get_backend().get(redis_key(user_id))
+    except Exception as e:
+        logger.warning(f"Не удалось прочитать пользователя {user_id} из кеша: {str(e)}")
+        return None
+    if value is None:
+        return None
+    return CachedUser(JsonCoder.decode(value))
+
+
+async def set_user(user_id: int, user) -> CachedUser:
+    # хеш пароля в кеш не кладем, get_current_user он не нужен
+    user = CachedUser({key: value for key, value in user.items() if key != "hashed_password"})
+    if settings.USER_CACHE_TTL <= 0:
+        return user
+    if not settings.USER_CACHE_REDIS:
+        put_local(user_id, user)
+        return user
+    try:
+        await FastAPICache.get_backend().set(redis_key(user_id), JsonCoder.encode(user), expire=settings.USER_CACHE_TTL)
+    except Exception as e:
+        logger.warning(f"Не удалось сохранить пользователя {user_id} в кеш: {str(e)}")
+    return user
+
+
+def get_local(user_id: int) -> CachedUser | None:
+    cached = local_cache.get(user_id)
+    if not cached:
+        return None
+    expires_at, user = cached
+    if expires_at <= time.monotonic():
+        del local_cache[user_id]
+        return None
+    local_cache.move_to_end(user_id)
+    return user
+
+
+def put_local(user_id: int, user: CachedUser):
+    local_cache[user_id] = (time.monotonic() + settings.USER_CACHE_TTL, user)
+    local_cache.move_to_end(user_id)
+    while len(local_cache) > settings.USER_CACHE_SIZE:
+        local_cache.popitem(last=False)
+
+
+async def invalidate_user(user_id: int):
+    """Сбросить пользователя из кеша после коммита изменений"""
+    await on_commit(lambda: clear_user(user_id))
+
+
+async def clear_user(user_id: int):
+    local_cache.pop(user_id, None)
+    if not settings.USER_CACHE_REDIS:
+        return
+    try:
+        # FastAPICache.clear(key=...) добавил бы namespace-префикс и стер весь кеш
+        await FastAPICache.get_backend().clear(key=redis_key(user_id))
+    except Exception as e:
+        # Запись в БД уже есть, старые данные проживут не дольше USER_CACHE_TTL
+        logger.warning(f"Не удалось сбросить пользователя {user_id} из кеша: {str(e)}")
@@ -1,6 +1,19 @@
 from app.dao.base import BaseDAO
+from app.users.cache import invalidate_user
 from app.users.model import User
 
 
 class UsersDao(BaseDAO):
     model = User
+
+    @classmethod
+    async def update(cls, id: int, field: str, data):
+        user = await super().update(id, field, data)
+        await invalidate_user(id)
+        return user
+
+    @classmethod
+    async def delete(cls, id: int):
+        deleted = await super().delete(id)
+        await invalidate_user(id)
+        return deleted
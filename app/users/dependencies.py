@@ -5,13 +5,14 @@ from jose import JWTError, jwt
 from sqlalchemy.ext.asyncio import AsyncSession
 
 from app.config import settings
-from app.database import async_session_maker
+from app.database import unit_of_work
 from app.exceptions import (
     ExpiredTokenException,
     IncorrectTokenFormatException,
     TokenAbsentException,
     UserIsNotPresentException,
 )
+from app.users.cache import get_user, set_user
 from app.users.dao import UsersDao
 
 
@@ -36,21 +37,18 @@ async def get_current_user(token: str = Depends(get_token)):
     if not user_id:
         raise UserIsNotPresentException
 
+    user = await get_user(int(user_id))
+    if user:
+        return user
+
     user = await UsersDao.find_by_id(int(user_id))
     if not user:
         raise UserIsNotPresentException
 
-    return user
+    return await set_user(int(user_id), user)
 
 
 async def get_async_session() -> AsyncSession:
-
-    async with async_session_maker() as session:
-        try:
-            yield session
-            await session.commit()  # Коммит при успешном выполнении
-        except Exception as e:
-            await session.rollback()  # Откат при ошибке
-            raise e
-        finally:
-            await session.close()  # Всегда закрываем сессию
+    """Общая сессия запроса: все вызовы DAO внутри запроса идут через нее"""
+    async with unit_of_work() as session:
+        yield session
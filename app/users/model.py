@@ -30,12 +30,12 @@ class User(Base):
     registrations = relationship("Registration", back_populates="user")
     registration_additional = relationship("Registration_additional", back_populates="user")
     coworking_reservations: Mapped[list["CoworkingReservation"]] = relationship(
-        back_populates="user", lazy="selectin", cascade="all, delete"
+        back_populates="user", lazy="raise", cascade="all, delete"
     )
 
     court_reservations: Mapped[list["CourtReservation"]] = relationship(
         back_populates="user", 
-        lazy="selectin", 
+        lazy="raise", 
         cascade="all, delete"
     )
 
@@ -1,3 +1,5 @@
+import logging
+
 from fastapi import APIRouter, Depends, Response
 from fastapi.responses import JSONResponse
 
@@ -9,6 +11,8 @@ from app.users.dependencies import get_current_user
 from app.users.model import User
 from app.users.schemas import RegistrationModel, ResetPassword, ResetRequest, UpdateProfile, UserAuthResponse, UserCreateResponse
 
+logger = logging.getLogger(__name__)
+
 router = APIRouter(prefix="/users", tags=["Пользователи"])
 
 
@@ -36,7 +40,7 @@ async def registration(user_data: RegistrationModel):
     new_user = await UsersDao.add(
         username=user_data.username,
         email=user_data.email,
-        hashed_password=get_password_hash(user_data.password),
+        hashed_password=await get_password_hash(user_data.password),
         is_active=False
     )
     if new_user:
@@ -49,8 +53,7 @@ async def registration(user_data: RegistrationModel):
 @router.post("/auth")
 async def login(response: Response, auth_model: UserAuthResponse):
     user = await auth_user(email=auth_model.email, password=auth_model.password)
-    print(user.is_active)
-    print(type(user.is_active))
+    logger.debug("Вход пользователя %s, is_active=%s", user.id, user.is_active)
     if user.is_active==False:
         send_confirm_email.delay(to=user.email, username=user.username)
         raise UserIsNotActiveException
@@ -112,7 +115,7 @@ async def reset_password(reset_password: ResetPassword):
     user = await UsersDao.find_one_or_none(email=email)
     if not user:
         raise UserIsNotPresentException
-    await UsersDao.update(id=user.id, field="hashed_password", data=get_password_hash(reset_password.new_password))
+    await UsersDao.update(id=user.id, field="hashed_password", data=await get_password_hash(reset_password.new_password))
     return {"msg": "Пароль сброшен"}
 
 @router.post("/update-profile")